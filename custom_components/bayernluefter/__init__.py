@@ -2,31 +2,78 @@
 Support for Bayernluefter.
 """
 
+import asyncio
 import logging
-from datetime import timedelta, datetime
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
 from typing import Any
 from aiohttp import ClientError
-from requests.exceptions import RequestException
 
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_HOST, CONF_SCAN_INTERVAL, Platform
+from homeassistant.exceptions import ConfigEntryNotReady, HomeAssistantError
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.device_registry import DeviceInfo, format_mac
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.entity import Entity, EntityDescription
 from homeassistant.helpers.entity_registry import RegistryEntry, async_migrate_entries
 from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.issue_registry import (
+    IssueSeverity,
+    async_create_issue,
+    async_delete_issue,
+)
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
-
-from .pyernluefter import Bayernluefter
-
-from .const import DOMAIN, DEFAULT_SCAN_INTERVAL
+from homeassistant.helpers.update_coordinator import CoordinatorEntity, UpdateFailed
+
+from .pyernluefter import (
+    Bayernluefter,
+    BayernluefterError,
+    CommandNotAppliedError,
+    Endpoint,
+    MalformedResponseError,
+)
+from .pyernluefter.journal import JournalWriter
+
+from .accumulators import Accumulators, parse_power_by_speed
+from .anomaly import AnomalyDetector
+from .bridge import SIGNAL_SNAPSHOT, async_setup_mqtt_bridge, snapshot_diff
+from .comfort import ComfortSetpoints, async_get_controller
+from .const import (
+    DOMAIN,
+    DEFAULT_SCAN_INTERVAL,
+    CONF_COMFORT_CONTROL,
+    CONF_TARGET_HUMIDITY,
+    CONF_VERIFY_COMMANDS,
+    CONF_MQTT_TOPIC,
+    CONF_JOURNAL,
+    CONF_POWER_BY_SPEED,
+    DEFAULT_TARGET_HUMIDITY,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 
 UPDATE_SCAN_INTERVAL = timedelta(days=1)  # check once per day for firmware updates
+LIVENESS_PROBE_INTERVAL = timedelta(minutes=5)  # poll rate if all entities disabled
+
+DATA_MQTT_BRIDGES = f"{DOMAIN}_mqtt_bridges"
+DATA_SETUP = f"{DOMAIN}_setup"
+
+SETUP_CONCURRENCY = 4  # devices contacted in parallel during setup
+FIRST_ATTEMPT_TIMEOUT = 5  # seconds, offline devices are retried later by HA
+
+ACCUMULATORS_STORAGE_VERSION = 1
+ANOMALIES_STORAGE_VERSION = 1
+STATE_SAVE_DELAY = 60  # seconds
+
+# maximum age of fetched data in seconds, live data is fetched on every poll
+FETCH_MAX_AGE = {Endpoint.LATEST_VERSIONS: UPDATE_SCAN_INTERVAL.total_seconds()}
 
 PLATFORMS = [
     Platform.SENSOR,
@@ -41,17 +88,35 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up component from a config entry,
     config_entry contains data from config entry database."""
     session = async_get_clientsession(hass)
-    device = Bayernluefter(entry.data[CONF_HOST], session)
-
-    await device.poll_latest_versions()
+    device = Bayernluefter(
+        entry.data[CONF_HOST],
+        session,
+        verify_commands=entry.options.get(CONF_VERIFY_COMMANDS, False),
+    )
 
     update_interval = timedelta(
         seconds=entry.options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
     )
     coordinator = BayernluefterDataUpdateCoordinator(
-        hass, device=device, update_interval=update_interval
+        hass,
+        device=device,
+        update_interval=update_interval,
+        store=_accumulators_store(hass, entry),
+        anomaly_store=_anomalies_store(hass, entry),
     )
-    await coordinator.async_config_entry_first_refresh()
+    await coordinator.async_load_state()
+    _setup_energy_estimate(entry, coordinator)
+
+    setup = _async_get_setup_state(hass)
+    start = time.monotonic()
+    try:
+        async with setup.semaphore:
+            await _async_first_refresh(
+                coordinator, first_attempt=entry.entry_id not in setup.attempted
+            )
+    finally:
+        setup.attempted.add(entry.entry_id)
+        _async_report_setup_time(hass, setup, entry, start)
 
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
 
@@ -59,16 +124,92 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     entry.async_on_unload(entry.add_update_listener(on_update_options_listener))
 
-    async def poll_latest_versions(now: datetime) -> None:
-        await device.poll_latest_versions()
+    _async_setup_comfort_control(hass, entry, coordinator)
+    entry.async_on_unload(
+        lambda: async_get_controller(hass).async_unregister(entry.entry_id)
+    )
+
+    _async_setup_mqtt_bridge(hass, entry, coordinator)
+    entry.async_on_unload(lambda: _async_stop_mqtt_bridge(hass, entry))
+
+    _setup_journal(hass, entry, coordinator)
 
     entry.async_on_unload(
-        async_track_time_interval(hass, poll_latest_versions, UPDATE_SCAN_INTERVAL)
+        async_track_time_interval(
+            hass, coordinator.async_liveness_probe, LIVENESS_PROBE_INTERVAL
+        )
     )
 
     return True
 
 
+@dataclass
+class _SetupState:
+    """Setup coordination of all config entries of the domain."""
+
+    semaphore: asyncio.Semaphore = field(
+        default_factory=lambda: asyncio.Semaphore(SETUP_CONCURRENCY)
+    )
+    started: float = field(default_factory=time.monotonic)
+    attempted: set[str] = field(default_factory=set)
+    reported: bool = False
+
+
+@callback
+def _async_get_setup_state(hass: HomeAssistant) -> _SetupState:
+    if DATA_SETUP not in hass.data:
+        hass.data[DATA_SETUP] = _SetupState()
+    return hass.data[DATA_SETUP]
+
+
+async def _async_first_refresh(
+    coordinator: "BayernluefterDataUpdateCoordinator", first_attempt: bool
+) -> None:
+    """Fetch initial data, give up early on the first attempt.
+
+    An offline device shall not delay the start of Home Assistant, it is
+    retried in the background with the backoff of ConfigEntryNotReady. Every
+    failed attempt raises ConfigEntryNotReady, entities are only set up with
+    data.
+    """
+    timeout = FIRST_ATTEMPT_TIMEOUT if first_attempt else None
+    try:
+        async with asyncio.timeout(timeout):
+            await coordinator.async_config_entry_first_refresh()
+    except TimeoutError as err:
+        raise ConfigEntryNotReady(
+            f"{coordinator._device.url} did not answer within "
+            f"{FIRST_ATTEMPT_TIMEOUT} seconds"
+        ) from err
+
+    if not coordinator.data or "MAC" not in coordinator.data:
+        raise ConfigEntryNotReady(
+            f"{coordinator._device.url} did not provide its MAC address"
+        )
+
+
+@callback
+def _async_report_setup_time(
+    hass: HomeAssistant, setup: _SetupState, entry: ConfigEntry, start: float
+) -> None:
+    _LOGGER.debug(
+        f"Initial refresh of {entry.title} took {time.monotonic() - start:.2f}s"
+    )
+    if setup.reported:
+        return
+    entry_ids = {
+        e.entry_id
+        for e in hass.config_entries.async_entries(DOMAIN)
+        if not e.disabled_by
+    }
+    if entry_ids <= setup.attempted:
+        setup.reported = True
+        _LOGGER.info(
+            f"First setup attempt of {len(entry_ids)} devices took "
+            f"{time.monotonic() - setup.started:.2f}s"
+        )
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
@@ -78,10 +219,105 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove persisted data of a deleted config entry."""
+    await _accumulators_store(hass, entry).async_remove()
+    await _anomalies_store(hass, entry).async_remove()
+    async_delete_issue(hass, DOMAIN, _anomaly_issue_id(entry.entry_id))
+
+
+def _accumulators_store(hass: HomeAssistant, entry: ConfigEntry) -> Store:
+    return Store(
+        hass, ACCUMULATORS_STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.accumulators"
+    )
+
+
+def _anomalies_store(hass: HomeAssistant, entry: ConfigEntry) -> Store:
+    return Store(
+        hass, ANOMALIES_STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.anomalies"
+    )
+
+
+def _anomaly_issue_id(entry_id: str) -> str:
+    return f"efficiency_degraded_{entry_id}"
+
+
 async def on_update_options_listener(hass: HomeAssistant, entry: ConfigEntry):
     """Handle options update."""
     coordinator = hass.data[DOMAIN][entry.entry_id]
-    coordinator.update_interval = timedelta(seconds=entry.options[CONF_SCAN_INTERVAL])
+    coordinator.base_update_interval = timedelta(
+        seconds=entry.options[CONF_SCAN_INTERVAL]
+    )
+    coordinator.update_interval = coordinator.base_update_interval
+    coordinator._device.verify_commands = entry.options.get(CONF_VERIFY_COMMANDS, False)
+    _async_setup_comfort_control(hass, entry, coordinator)
+    _async_setup_mqtt_bridge(hass, entry, coordinator)
+    _setup_journal(hass, entry, coordinator)
+    _setup_energy_estimate(entry, coordinator)
+
+
+def _setup_energy_estimate(
+    entry: ConfigEntry, coordinator: "BayernluefterDataUpdateCoordinator"
+) -> None:
+    """Apply the configured power per speed level to the energy estimate."""
+    coordinator.accumulators.power_by_speed = parse_power_by_speed(
+        entry.options.get(CONF_POWER_BY_SPEED, "")
+    )
+
+
+def _setup_journal(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    coordinator: "BayernluefterDataUpdateCoordinator",
+) -> None:
+    """Enable or disable the snapshot journal according to options."""
+    if entry.options.get(CONF_JOURNAL, False):
+        mac = format_mac(coordinator._device.data["MAC"]).replace(":", "")
+        coordinator.journal = JournalWriter(hass.config.path(DOMAIN, f"{mac}.journal"))
+    else:
+        coordinator.journal = None
+
+
+@callback
+def _async_setup_mqtt_bridge(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    coordinator: "BayernluefterDataUpdateCoordinator",
+) -> None:
+    """(Re)start the MQTT bridge if a topic is configured in options."""
+    _async_stop_mqtt_bridge(hass, entry)
+    topic = entry.options.get(CONF_MQTT_TOPIC)
+    if topic:
+        mac = format_mac(coordinator._device.data["MAC"])
+        hass.data.setdefault(DATA_MQTT_BRIDGES, {})[
+            entry.entry_id
+        ] = async_setup_mqtt_bridge(hass, coordinator, mac, topic)
+
+
+@callback
+def _async_stop_mqtt_bridge(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    unsub = hass.data.get(DATA_MQTT_BRIDGES, {}).pop(entry.entry_id, None)
+    if unsub is not None:
+        unsub()
+
+
+@callback
+def _async_setup_comfort_control(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    coordinator: "BayernluefterDataUpdateCoordinator",
+) -> None:
+    """Register the device at the comfort controller if enabled in options."""
+    controller = async_get_controller(hass)
+    if entry.options.get(CONF_COMFORT_CONTROL, False):
+        setpoints = ComfortSetpoints(
+            target_humidity=entry.options.get(
+                CONF_TARGET_HUMIDITY, DEFAULT_TARGET_HUMIDITY
+            )
+        )
+        controller.async_register(entry.entry_id, coordinator, setpoints)
+    else:
+        controller.async_unregister(entry.entry_id)
 
 
 # Migrate entity unique-ids from version 1 to version 2
@@ -131,23 +367,174 @@ class BayernluefterDataUpdateCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         hass: HomeAssistant,
         device: Bayernluefter,
         update_interval,
+        store: Store | None = None,
+        anomaly_store: Store | None = None,
     ) -> None:
         """Initialize."""
         self._device = device
+        # snapshots polled to verify commands are processed like regular ones
+        device.verify_refresh = self.async_refresh
+        self._failure_counter = 0
+        self.accumulators = Accumulators()
+        self._store = store
+        self.journal: JournalWriter | None = None
+        self.anomalies = AnomalyDetector()
+        self._anomaly_store = anomaly_store
+        # entities which need the latest firmware versions
+        self.firmware_consumers: set[Entity] = set()
+        self._last_fetch_time: float | None = None
+        # monotonic time when the current snapshot was received
+        self.last_snapshot_time: float | None = None
+        # configured interval, stretched for unhealthy devices
+        self.base_update_interval = update_interval
+
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN,
+            update_interval=update_interval,
+            always_update=False,
+        )
 
-        super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=update_interval)
+    @callback
+    def async_add_listener(
+        self, update_callback: CALLBACK_TYPE, context: Any = None
+    ) -> Callable[[], None]:
+        """Listen for data updates, resume polling if it was suspended.
+
+        Without listeners (all entities disabled) the coordinator does not
+        schedule any polls. The first listener triggers an immediate refresh
+        instead of waiting for the next interval if the data is outdated.
+        """
+        resume = not self._listeners and self._is_outdated()
+        remove_listener = super().async_add_listener(update_callback, context)
+        if resume:
+            self.hass.async_create_task(self.async_request_refresh())
+        return remove_listener
+
+    async def async_load_state(self) -> None:
+        """Restore the cumulative counters and learned baselines of the previous run."""
+        if self._store is not None:
+            self.accumulators = Accumulators(await self._store.async_load())
+        if self._anomaly_store is not None:
+            self.anomalies = AnomalyDetector(await self._anomaly_store.async_load())
+            if self.anomalies.degraded:
+                # issues are not kept across restarts, raise it again
+                self._async_update_anomaly_issue()
+
+    async def async_liveness_probe(self, now: datetime) -> None:
+        """Probe the device at a low rate while polling is suspended."""
+        if self._listeners:
+            return
+        try:
+            await self._device.probe()
+        except BayernluefterError as err:
+            self.async_set_update_error(err)
+        else:
+            self.last_update_success = True
+
+    @callback
+    def _async_update_anomaly_issue(self) -> None:
+        """Raise or clear the repair issue for degraded heat recovery."""
+        if self.config_entry is None:
+            return
+        issue_id = _anomaly_issue_id(self.config_entry.entry_id)
+        if self.anomalies.degraded:
+            async_create_issue(
+                self.hass,
+                DOMAIN,
+                issue_id,
+                is_fixable=False,
+                severity=IssueSeverity.WARNING,
+                translation_key="efficiency_degraded",
+                translation_placeholders={"name": self.config_entry.title},
+            )
+        else:
+            async_delete_issue(self.hass, DOMAIN, issue_id)
+
+    def _is_outdated(self) -> bool:
+        return (
+            self._last_fetch_time is None
+            or self.update_interval is None
+            or time.monotonic() - self._last_fetch_time
+            >= self.update_interval.total_seconds()
+        )
 
     async def _async_update_data(self) -> dict[str, Any]:
         """Update data via library."""
+        # fetch only what enabled entities need and what is outdated
+        wanted = {Endpoint.LIVE}
+        if self.firmware_consumers:
+            wanted.add(Endpoint.LATEST_VERSIONS)
+        endpoints = self._device.plan_fetch(wanted, FETCH_MAX_AGE)
+        self._last_fetch_time = time.monotonic()
+        # interval which led to this poll, it is adapted after the fetch
+        interval = self.update_interval.total_seconds()
+
         try:
-            await self._device.update()
+            await self._device.fetch(endpoints)
             self._failure_counter = 0
-        except (ClientError, RequestException):
+        except (ClientError, asyncio.TimeoutError, MalformedResponseError) as err:
             self._failure_counter += 1
+            # keep the previous data on transient errors, there is nothing to
+            # fall back to on the first refresh during setup
+            if self.data is not None and self._failure_counter < 3:
+                return self.data
             if self._failure_counter == 3:
                 _LOGGER.error("3 consecutive errors")
-            if self._failure_counter >= 3:
-                raise
+            raise UpdateFailed(
+                f"Failed to fetch data from {self._device.url}: {err}"
+            ) from err
+        except BayernluefterError as err:
+            # not transient, e.g. the template was removed or another host
+            # took the address
+            self._failure_counter += 1
+            raise UpdateFailed(f"{self._device.url}: {err}") from err
+        finally:
+            # poll unhealthy devices less often
+            self.update_interval = (
+                self.base_update_interval * self._device.health.interval_factor
+            )
+
+        # a stale snapshot keeps the previous data, listeners are not updated
+        if self._device.stale:
+            return self.data
+
+        self.last_snapshot_time = time.monotonic()
+
+        # share the snapshot with external consumers
+        snapshot = self._device.data
+        diff = snapshot_diff(self.data, snapshot)
+        if diff:
+            async_dispatcher_send(
+                self.hass,
+                SIGNAL_SNAPSHOT,
+                format_mac(snapshot.get("MAC", "")),
+                snapshot,
+                diff,
+            )
+
+        if self.journal is not None:
+            try:
+                await self.hass.async_add_executor_job(
+                    self.journal.append, snapshot, time.time()
+                )
+            except (OSError, ValueError) as err:
+                _LOGGER.warning(f"Failed to write journal {self.journal.path}: {err}")
+
+        if self.anomalies.update(snapshot, time.monotonic()):
+            self._async_update_anomaly_issue()
+        if self._anomaly_store is not None:
+            self._anomaly_store.async_delay_save(
+                lambda: self.anomalies.state, STATE_SAVE_DELAY
+            )
+
+        self.accumulators.update(self._device.data, time.monotonic(), interval)
+        if self._store is not None:
+            self._store.async_delay_save(
+                lambda: self.accumulators.values, STATE_SAVE_DELAY
+            )
+        return self._device.data
 
 
 class BayernluefterEntity(CoordinatorEntity, Entity):
@@ -167,6 +554,7 @@ class BayernluefterEntity(CoordinatorEntity, Entity):
         device = coordinator._device
         self._coordinator = coordinator
         self._device = device
+        self._key = description.key
         self._attr_unique_id = f"{format_mac(device.data['MAC'])}-{description.key}"
         self._attr_device_info = DeviceInfo(
             configuration_url=f"http://{device.data.get('LocalIP')}",
@@ -179,4 +567,14 @@ class BayernluefterEntity(CoordinatorEntity, Entity):
 
     @property
     def available(self) -> bool:
-        return super().available and self.entity_description.key in self._device.data
+        return super().available and self._key in self._device.data
+
+    @contextmanager
+    def _command_errors(self) -> Iterator[None]:
+        """Report commands which were not applied as service call errors."""
+        try:
+            yield
+        except CommandNotAppliedError as err:
+            raise HomeAssistantError(
+                f"{self._device.data.get('DeviceName')} did not apply command: {err}"
+            ) from err
@@ -0,0 +1,102 @@
+"""
+Cumulative counters for Bayernluefter devices.
+
+The counters are integrated from consecutive snapshots, so no recorder history
+is required to get runtimes, energy and transported humidity.
+"""
+
+import re
+from typing import Any
+
+# Gaps between two snapshots longer than this many poll intervals are not
+# integrated, the device state in between is unknown. Short intervals still
+# tolerate a few minutes of failed polls.
+MAX_GAP_INTERVALS = 3
+MIN_MAX_GAP = 600  # seconds
+
+SPEED_LEVELS = range(1, 11)
+
+_POWER_SEPARATOR_RE = re.compile(r"[\s;]+")
+
+RUNTIME = "runtime"  # hours switched on
+RUNTIME_SPEED = "runtime_speed_{}"  # hours at speed level
+RUNTIME_FROST_PROTECTION = "runtime_frost_protection"  # hours
+RUNTIME_DEFROST = "runtime_defrost"  # hours
+ENERGY = "energy"  # kWh, estimated from the configured power
+HUMIDITY_TRANSPORT = "humidity_transport"  # g
+
+
+class Accumulators:
+    """Counters updated incrementally from consecutive snapshots."""
+
+    def __init__(
+        self,
+        values: dict[str, float] | None = None,
+        power_by_speed: dict[int, float] | None = None,
+    ) -> None:
+        self.values: dict[str, float] = {
+            RUNTIME: 0.0,
+            RUNTIME_FROST_PROTECTION: 0.0,
+            RUNTIME_DEFROST: 0.0,
+            ENERGY: 0.0,
+            HUMIDITY_TRANSPORT: 0.0,
+            **{RUNTIME_SPEED.format(level): 0.0 for level in SPEED_LEVELS},
+        }
+        if values:
+            self.values.update(values)
+        # electrical power in W per speed level, the device does not report
+        # its power consumption, the energy is only estimated if it is known
+        self.power_by_speed = power_by_speed
+        self._last_data: dict[str, Any] | None = None
+        self._last_time: float | None = None
+
+    def update(self, data: dict[str, Any], now: float, interval: float) -> None:
+        """Integrate the state of the previous snapshot until now.
+
+        `now` is a monotonic timestamp, `interval` the poll interval, both in
+        seconds.
+        """
+        if self._last_data is not None and self._last_time is not None:
+            elapsed = now - self._last_time
+            if 0 < elapsed <= max(MIN_MAX_GAP, MAX_GAP_INTERVALS * interval):
+                self._integrate(self._last_data, elapsed)
+        self._last_data = data
+        self._last_time = now
+
+    def _integrate(self, data: dict[str, Any], seconds: float) -> None:
+        hours = seconds / 3600
+        values = self.values
+
+        if data.get("SystemOn"):
+            values[RUNTIME] += hours
+            speed = data.get("Speed_Out")
+            if speed in SPEED_LEVELS:
+                values[RUNTIME_SPEED.format(speed)] += hours
+                if self.power_by_speed is not None:
+                    values[ENERGY] += self.power_by_speed[speed] * hours / 1000
+
+            transport = data.get("Humidity_Transport")
+            if transport is not None and transport > 0:
+                values[HUMIDITY_TRANSPORT] += transport * seconds / 86400
+
+        if data.get("FrostschutzAktiv"):
+            values[RUNTIME_FROST_PROTECTION] += hours
+        if data.get("AbtauMode"):
+            values[RUNTIME_DEFROST] += hours
+
+
+def parse_power_by_speed(text: str) -> dict[int, float] | None:
+    """Parse the power in W of all speed levels, e.g. measured with a plug.
+
+    The values are separated by spaces or semicolons, an empty text disables
+    the estimate. Raises ValueError if the text is invalid.
+    """
+    text = text.strip()
+    if not text:
+        return None
+    values = [float(v.replace(",", ".")) for v in _POWER_SEPARATOR_RE.split(text)]
+    if len(values) != len(SPEED_LEVELS):
+        raise ValueError(f"Expected {len(SPEED_LEVELS)} values, got {len(values)}")
+    if any(v < 0 for v in values):
+        raise ValueError("Power must not be negative")
+    return dict(zip(SPEED_LEVELS, values))
@@ -0,0 +1,166 @@
+"""
+Detection of degrading heat recovery.
+
+A slow moving average learns the normal efficiency of a device, a fast one
+follows the current value. If the fast average stays well below the learned
+normal for a while (e.g. clogged filters, failing motor), the device is
+flagged. Memory per device is constant.
+
+The averages are weighted by the time between snapshots, so the behaviour
+does not depend on the poll interval.
+"""
+
+import math
+from typing import Any
+
+BASELINE_TIME_CONSTANT = 86400  # seconds, ~1 day of history
+CURRENT_TIME_CONSTANT = 180  # seconds
+
+WARMUP_TIME = 6 * 3600  # seconds observed before a baseline is trusted
+DEVIATION = 3  # standard deviations of the baseline
+MIN_STD = 1.0  # percent, avoids flagging noise of a very stable device
+SUSTAINED_TIME = 3600  # seconds below the baseline before flagging
+
+# a longer gap between two snapshots (e.g. polling suspended) counts as this
+MAX_SAMPLE_GAP = 3600  # seconds
+
+# the temperature efficiency is meaningless for small temperature differences
+MIN_TEMPERATURE_DIFFERENCE = 5  # K
+
+
+def _alpha(seconds: float, time_constant: float) -> float:
+    """Weight of a sample which represents the given time."""
+    return 1 - math.exp(-seconds / time_constant)
+
+
+class _Ewma:
+    """Exponentially weighted mean and variance."""
+
+    __slots__ = ("mean", "var")
+
+    def __init__(self, state: list[float | None] | None = None) -> None:
+        self.mean: float | None = None
+        self.var = 0.0
+        if state:
+            self.mean, self.var = state
+
+    @property
+    def state(self) -> list[float | None]:
+        return [self.mean, self.var]
+
+    def update(self, value: float, alpha: float) -> None:
+        if self.mean is None:
+            self.mean = value
+            return
+        diff = value - self.mean
+        incr = alpha * diff
+        self.mean += incr
+        self.var = (1 - alpha) * (self.var + diff * incr)
+
+
+class _Metric:
+    """Baseline, current value and deviation time of one metric."""
+
+    __slots__ = ("baseline", "current", "observed", "low_time")
+
+    def __init__(self, state: dict[str, Any] | None = None) -> None:
+        state = state or {}
+        self.baseline = _Ewma(state.get("baseline"))
+        self.current = _Ewma(state.get("current"))
+        self.observed = state.get("observed", 0.0)  # seconds in the baseline
+        self.low_time = state.get("low_time", 0.0)  # seconds below the baseline
+
+    @property
+    def state(self) -> dict[str, Any]:
+        return {
+            "baseline": self.baseline.state,
+            "current": self.current.state,
+            "observed": self.observed,
+            "low_time": self.low_time,
+        }
+
+    @property
+    def degraded(self) -> bool:
+        return self.low_time >= SUSTAINED_TIME
+
+    def update(self, value: float, seconds: float) -> None:
+        """Add a value which represents the given time."""
+        self.current.update(value, _alpha(seconds, CURRENT_TIME_CONSTANT))
+        if self.observed >= WARMUP_TIME:
+            std = max(math.sqrt(self.baseline.var), MIN_STD)
+            if self.current.mean < self.baseline.mean - DEVIATION * std:
+                self.low_time += seconds
+            else:
+                self.low_time = 0.0
+
+        # a deviating value must not become the new normal
+        if self.low_time == 0:
+            self.baseline.update(value, _alpha(seconds, BASELINE_TIME_CONSTANT))
+            self.observed += seconds
+
+
+class AnomalyDetector:
+    """Streaming detector for degrading heat recovery of one device."""
+
+    def __init__(self, state: dict[str, Any] | None = None) -> None:
+        state = state or {}
+        # the reported efficiency depends on the speed, learn it per level
+        self._efficiency: dict[int, _Metric] = {
+            int(speed): _Metric(metric)
+            for speed, metric in state.get("efficiency", {}).items()
+        }
+        self._temperature_efficiency = _Metric(state.get("temperature_efficiency"))
+        self.degraded: bool = state.get("degraded", False)
+        self._last_time: float | None = None
+
+    @property
+    def state(self) -> dict[str, Any]:
+        """State to be persisted, pass it to the constructor to restore it."""
+        return {
+            "efficiency": {
+                str(speed): metric.state for speed, metric in self._efficiency.items()
+            },
+            "temperature_efficiency": self._temperature_efficiency.state,
+            "degraded": self.degraded,
+        }
+
+    def update(self, data: dict[str, Any], now: float) -> bool:
+        """Add a snapshot, return True if the degraded state changed.
+
+        `now` is a monotonic timestamp in seconds.
+        """
+        seconds = (
+            0.0
+            if self._last_time is None
+            else min(max(now - self._last_time, 0.0), MAX_SAMPLE_GAP)
+        )
+        self._last_time = now
+
+        if (
+            not data.get("SystemOn")
+            or data.get("FrostschutzAktiv")
+            or data.get("AbtauMode")
+        ):
+            # heat recovery is intentionally reduced
+            return False
+
+        speed = data.get("Speed_Out")
+        efficiency = data.get("Efficiency")
+        if speed is not None and efficiency is not None:
+            self._efficiency.setdefault(speed, _Metric()).update(efficiency, seconds)
+
+        temp_in = data.get("Temp_In")
+        temp_out = data.get("Temp_Out")
+        temp_fresh = data.get("Temp_Fresh")
+        if None not in (temp_in, temp_out, temp_fresh):
+            difference = temp_in - temp_out
+            if abs(difference) >= MIN_TEMPERATURE_DIFFERENCE:
+                recovered = 100 * (temp_fresh - temp_out) / difference
+                self._temperature_efficiency.update(recovered, seconds)
+
+        degraded = self._temperature_efficiency.degraded or any(
+            metric.degraded for metric in self._efficiency.values()
+        )
+        changed = degraded != self.degraded
+        self.degraded = degraded
+        return changed
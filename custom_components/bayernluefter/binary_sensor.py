@@ -3,11 +3,14 @@ Support for Bayernluefter sensors.
 """
 
 import logging
+from collections.abc import Callable
+from dataclasses import dataclass
 
 from homeassistant.const import (
     EntityCategory,
 )
 from homeassistant.components.binary_sensor import (
+    BinarySensorDeviceClass,
     BinarySensorEntity,
     BinarySensorEntityDescription,
 )
@@ -50,6 +53,28 @@ SENSOR_TYPES_CONVERTED: tuple[BinarySensorEntityDescription, ...] = (
 )
 
 
+@dataclass(frozen=True, kw_only=True)
+class BayernluefterComputedBinarySensorEntityDescription(
+    BinarySensorEntityDescription
+):
+    """Describes a binary sensor for states which are not part of the export."""
+
+    value_fn: Callable[[DataUpdateCoordinator], bool | None]
+
+
+COMPUTED_SENSOR_TYPES: tuple[
+    BayernluefterComputedBinarySensorEntityDescription, ...
+] = (
+    BayernluefterComputedBinarySensorEntityDescription(
+        key="EfficiencyDegraded",
+        name="Efficiency_Degraded",
+        device_class=BinarySensorDeviceClass.PROBLEM,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda coordinator: coordinator.anomalies.degraded,
+    ),
+)
+
+
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up sensor entries."""
     coordinator: DataUpdateCoordinator = hass.data[DOMAIN][config_entry.entry_id]
@@ -60,6 +85,12 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
             for description in SENSOR_TYPES_CONVERTED
         ]
     )
+    entities.extend(
+        [
+            BayernluefterComputedBinarySensor(coordinator, description)
+            for description in COMPUTED_SENSOR_TYPES
+        ]
+    )
     async_add_entities(entities)
 
 
@@ -79,3 +110,27 @@ class BayernluefterBinarySensor(BayernluefterEntity, BinarySensorEntity):
     def is_on(self) -> bool:
         """Return True if the binary sensor is on."""
         return self._device.data[self.entity_description.key]
+
+
+class BayernluefterComputedBinarySensor(BayernluefterEntity, BinarySensorEntity):
+    """A binary sensor for states derived by the integration."""
+
+    entity_description: BayernluefterComputedBinarySensorEntityDescription
+
+    def __init__(
+        self,
+        coordinator: DataUpdateCoordinator,
+        description: BayernluefterComputedBinarySensorEntityDescription,
+    ) -> None:
+        """Initialize a computed binary sensor entity for a Bayernluefter device."""
+        super().__init__(coordinator, description)
+        self.entity_description = description
+
+    @property
+    def available(self) -> bool:
+        return self._coordinator.last_update_success
+
+    @property
+    def is_on(self) -> bool | None:
+        """Return True if the binary sensor is on."""
+        return self.entity_description.value_fn(self._coordinator)
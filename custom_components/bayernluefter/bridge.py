@@ -0,0 +1,82 @@
+"""
+Share the snapshots of the coordinator with external consumers.
+
+Every new snapshot is sent on the Home Assistant dispatcher with signal
+SIGNAL_SNAPSHOT. The MQTT bridge forwards them, so dashboards or loggers do
+not have to poll the device themselves.
+"""
+
+import json
+import logging
+from datetime import date, time
+from enum import Enum
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+# payload: mac, snapshot, diff (changed fields of the snapshot)
+SIGNAL_SNAPSHOT = f"{DOMAIN}_snapshot"
+
+
+def snapshot_diff(old: dict[str, Any] | None, new: dict[str, Any]) -> dict[str, Any]:
+    """Return the fields of new which differ from old."""
+    if not old:
+        return dict(new)
+    return {key: value for key, value in new.items() if old.get(key) != value}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    raise TypeError(f"Unsupported type {type(value)}")
+
+
+def to_json(snapshot: dict[str, Any]) -> str:
+    """Serialize a converted snapshot."""
+    return json.dumps(snapshot, default=_json_default, separators=(",", ":"))
+
+
+@callback
+def async_setup_mqtt_bridge(
+    hass: HomeAssistant, coordinator: Any, mac: str, base_topic: str
+) -> CALLBACK_TYPE:
+    """Publish snapshots of one device to MQTT, returns a callback to stop.
+
+    The full snapshot is published retained to `<base_topic>/state`, the
+    changed fields to `<base_topic>/diff`. The bridge listens to the
+    coordinator, so it keeps polling even if all entities are disabled.
+    """
+    from homeassistant.components import mqtt
+
+    base_topic = base_topic.rstrip("/")
+
+    async def async_publish(
+        snapshot_mac: str, snapshot: dict[str, Any], diff: dict[str, Any]
+    ) -> None:
+        if snapshot_mac != mac or not diff:
+            return
+        try:
+            await mqtt.async_publish(
+                hass, f"{base_topic}/state", to_json(snapshot), retain=True
+            )
+            await mqtt.async_publish(hass, f"{base_topic}/diff", to_json(diff))
+        except Exception as err:  # noqa: BLE001
+            # MQTT not set up or broker unavailable, next snapshot will retry
+            _LOGGER.debug(f"Failed to publish snapshot of {mac}: {err}")
+
+    remove_listener = coordinator.async_add_listener(lambda: None)
+    disconnect = async_dispatcher_connect(hass, SIGNAL_SNAPSHOT, async_publish)
+
+    @callback
+    def async_stop() -> None:
+        disconnect()
+        remove_listener()
+
+    return async_stop
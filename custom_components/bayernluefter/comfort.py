@@ -0,0 +1,256 @@
+"""
+Local humidity control for Bayernluefter devices.
+
+The controller runs in Home Assistant on the cached coordinator data. All
+registered devices are evaluated in one tick, resulting speed changes are sent
+concurrently.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.issue_registry import (
+    IssueSeverity,
+    async_create_issue,
+    async_delete_issue,
+)
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_COMFORT_CONTROLLER = f"{DOMAIN}_comfort_controller"
+
+TICK_INTERVAL = timedelta(seconds=60)
+
+# humidity error (above hysteresis) which results in maximum speed
+FULL_SPEED_HUMIDITY_ERROR = 20  # percent
+
+
+@dataclass
+class ComfortSetpoints:
+    """Configuration of the comfort control for one device."""
+
+    target_humidity: float  # indoor relative humidity in percent
+    hysteresis: float = 3  # percent
+    min_speed: int = 1
+    max_speed: int = 10
+    max_step: int = 2  # maximum speed change per command
+    min_command_interval: float = 300  # seconds between two commands
+
+
+@dataclass
+class _ControlledDevice:
+    coordinator: Any  # BayernluefterDataUpdateCoordinator
+    setpoints: ComfortSetpoints
+    last_command: float = field(default=-math.inf)
+    commanded_speed: int | None = None  # speed set by the controller
+    confirmed: bool = False  # a snapshot showed the commanded speed
+    overridden: bool = False  # user changed the speed, device is left alone
+
+
+def dew_point(temperature: float, rel_humidity: float) -> float:
+    """Calculate the dew point using the Magnus formula."""
+    a, b = 17.62, 243.12
+    gamma = math.log(max(rel_humidity, 1) / 100) + a * temperature / (b + temperature)
+    return b * gamma / (a - gamma)
+
+
+def compute_target_speed(
+    data: dict[str, Any], setpoints: ComfortSetpoints
+) -> int | None:
+    """Compute the target speed from a converted export snapshot.
+
+    Temp_In/rel_Humidity_In/abs_Humidity_In describe the indoor air,
+    Temp_Out/rel_Humidity_Out/abs_Humidity_Out the outdoor air. Returns None if
+    the speed shall not be changed.
+    """
+    if not data.get("SystemOn") or data.get("TimerActiv"):
+        return None
+
+    try:
+        temp_in = data["Temp_In"]
+        temp_out = data["Temp_Out"]
+        rel_in = data["rel_Humidity_In"]
+        rel_out = data["rel_Humidity_Out"]
+        abs_in = data["abs_Humidity_In"]
+        abs_out = data["abs_Humidity_Out"]
+        speed = data["Speed_Out"]
+    except KeyError:
+        return None
+    if None in (temp_in, temp_out, rel_in, rel_out, abs_in, abs_out, speed):
+        return None
+
+    # outdoor air would condense inside or carry moisture in: ventilate minimal
+    if abs_out >= abs_in or dew_point(temp_out, rel_out) >= temp_in:
+        target = setpoints.min_speed
+    else:
+        error = rel_in - setpoints.target_humidity
+        if error < -setpoints.hysteresis:
+            target = setpoints.min_speed
+        elif error <= setpoints.hysteresis:
+            return None  # within hysteresis band
+        else:
+            demand = (error - setpoints.hysteresis) / FULL_SPEED_HUMIDITY_ERROR
+            demand = min(demand, 1)
+            target = round(
+                setpoints.min_speed
+                + demand * (setpoints.max_speed - setpoints.min_speed)
+            )
+
+    # rate limit the change
+    target = max(speed - setpoints.max_step, min(speed + setpoints.max_step, target))
+    if target == speed:
+        return None
+    return target
+
+
+class ComfortController:
+    """Closed-loop humidity control for all registered devices."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._hass = hass
+        self._devices: dict[str, _ControlledDevice] = {}
+        self._unsub_tick: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_register(
+        self, key: str, coordinator: Any, setpoints: ComfortSetpoints
+    ) -> Callable[[], None]:
+        """Add a device or update its setpoints, returns a callback to remove it."""
+        if key in self._devices:
+            self._devices[key].setpoints = setpoints
+        else:
+            self._devices[key] = _ControlledDevice(coordinator, setpoints)
+        if self._unsub_tick is None:
+            self._unsub_tick = async_track_time_interval(
+                self._hass, self.async_tick, TICK_INTERVAL
+            )
+        return lambda: self.async_unregister(key)
+
+    @callback
+    def async_unregister(self, key: str) -> None:
+        """Remove a device, a speed set by the controller is released."""
+        controlled = self._devices.pop(key, None)
+        async_delete_issue(self._hass, DOMAIN, _paused_issue_id(key))
+        if (
+            controlled is not None
+            and controlled.commanded_speed is not None
+            and not controlled.overridden
+        ):
+            # setting a speed freezes it, hand it back to the device
+            self._hass.async_create_task(self._async_reset_speed(controlled))
+        if not self._devices and self._unsub_tick is not None:
+            self._unsub_tick()
+            self._unsub_tick = None
+
+    async def async_tick(self, now: datetime | None = None) -> None:
+        """Evaluate all devices and send the resulting commands."""
+        monotonic = time.monotonic()
+        commands = []
+        for key, controlled in self._devices.items():
+            coordinator = controlled.coordinator
+            if not coordinator.last_update_success or controlled.overridden:
+                continue
+            self._check_command(controlled)
+            if controlled.overridden:
+                self._async_pause(key, controlled)
+                continue
+            setpoints = controlled.setpoints
+            if monotonic - controlled.last_command < setpoints.min_command_interval:
+                continue
+            if controlled.commanded_speed is not None and not controlled.confirmed:
+                # the command got lost, e.g. on a busy device
+                target = controlled.commanded_speed
+            else:
+                target = compute_target_speed(coordinator._device.data, setpoints)
+            if target is None:
+                continue
+            controlled.last_command = monotonic
+            commands.append(self._async_set_speed(controlled, target))
+
+        if commands:
+            await asyncio.gather(*commands)
+
+    def _check_command(self, controlled: _ControlledDevice) -> None:
+        """Confirm the last command or detect a manual change of the speed.
+
+        Only a change away from a confirmed speed is a manual change, a
+        command which was never applied is sent again.
+        """
+        if controlled.commanded_speed is None:
+            return
+        last_snapshot = controlled.coordinator.last_snapshot_time
+        if last_snapshot is None or last_snapshot < controlled.last_command:
+            # no data since the command yet
+            return
+        data = controlled.coordinator._device.data
+        if (
+            data.get("SpeedFrozen")
+            and data.get("Speed_Out") == controlled.commanded_speed
+        ):
+            controlled.confirmed = True
+        elif controlled.confirmed:
+            controlled.overridden = True
+
+    @callback
+    def _async_pause(self, key: str, controlled: _ControlledDevice) -> None:
+        device = controlled.coordinator._device
+        name = device.data.get("DeviceName", device.url)
+        _LOGGER.info(
+            f"Speed of {name} was changed manually, comfort control is paused "
+            "until it is enabled again"
+        )
+        async_create_issue(
+            self._hass,
+            DOMAIN,
+            _paused_issue_id(key),
+            is_fixable=False,
+            severity=IssueSeverity.WARNING,
+            translation_key="comfort_control_paused",
+            translation_placeholders={"name": name},
+        )
+
+    async def _async_set_speed(self, controlled: _ControlledDevice, speed: int) -> None:
+        coordinator = controlled.coordinator
+        device = coordinator._device
+        _LOGGER.debug(f"Comfort control sets speed of {device.url} to {speed}")
+        # a failed command is pending as well and sent again
+        controlled.commanded_speed = speed
+        controlled.confirmed = False
+        try:
+            await device.set_speed(speed)
+        except Exception as err:  # noqa: BLE001
+            _LOGGER.warning(f"Comfort control failed for {device.url}: {err}")
+            return
+        await coordinator.async_request_refresh()
+
+    async def _async_reset_speed(self, controlled: _ControlledDevice) -> None:
+        device = controlled.coordinator._device
+        _LOGGER.debug(f"Comfort control releases speed of {device.url}")
+        try:
+            await device.reset_speed()
+        except Exception as err:  # noqa: BLE001
+            _LOGGER.warning(f"Failed to release speed of {device.url}: {err}")
+            return
+        await controlled.coordinator.async_request_refresh()
+
+
+def _paused_issue_id(key: str) -> str:
+    return f"comfort_control_paused_{key}"
+
+
+@callback
+def async_get_controller(hass: HomeAssistant) -> ComfortController:
+    """Return the controller shared by all config entries."""
+    if DATA_COMFORT_CONTROLLER not in hass.data:
+        hass.data[DATA_COMFORT_CONTROLLER] = ComfortController(hass)
+    return hass.data[DATA_COMFORT_CONTROLLER]
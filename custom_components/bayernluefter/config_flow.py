@@ -15,13 +15,32 @@ from homeassistant.helpers import aiohttp_client, selector
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.device_registry import format_mac
 from homeassistant.helpers.schema_config_entry_flow import (
+    SchemaCommonFlowHandler,
+    SchemaFlowError,
     SchemaFlowFormStep,
     SchemaOptionsFlowHandler,
 )
 
-from .pyernluefter import Bayernluefter
+from .pyernluefter import (
+    Bayernluefter,
+    DeviceUnreachableError,
+    LegacyFirmwareError,
+    MalformedResponseError,
+    NotBayernluefterError,
+)
 
-from .const import DOMAIN, DEFAULT_SCAN_INTERVAL
+from .accumulators import parse_power_by_speed
+from .const import (
+    DOMAIN,
+    DEFAULT_SCAN_INTERVAL,
+    CONF_COMFORT_CONTROL,
+    CONF_TARGET_HUMIDITY,
+    CONF_VERIFY_COMMANDS,
+    CONF_MQTT_TOPIC,
+    CONF_JOURNAL,
+    CONF_POWER_BY_SPEED,
+    DEFAULT_TARGET_HUMIDITY,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -43,12 +62,41 @@ SIMPLE_OPTIONS_SCHEMA = vol.Schema(
                 max=600,
             ),
         ),
+        vol.Optional(CONF_VERIFY_COMMANDS, default=False): selector.BooleanSelector(),
+        vol.Optional(CONF_COMFORT_CONTROL, default=False): selector.BooleanSelector(),
+        vol.Optional(
+            CONF_TARGET_HUMIDITY, default=DEFAULT_TARGET_HUMIDITY
+        ): selector.NumberSelector(
+            selector.NumberSelectorConfig(
+                mode=selector.NumberSelectorMode.SLIDER,
+                unit_of_measurement="%",
+                min=30,
+                max=80,
+            ),
+        ),
+        vol.Optional(CONF_MQTT_TOPIC, default=""): selector.TextSelector(),
+        vol.Optional(CONF_JOURNAL, default=False): selector.BooleanSelector(),
+        vol.Optional(CONF_POWER_BY_SPEED, default=""): selector.TextSelector(),
     }
 )
 
+
+async def validate_options(
+    handler: SchemaCommonFlowHandler, user_input: dict
+) -> dict:
+    """Validate the options which the schema cannot check."""
+    try:
+        parse_power_by_speed(user_input.get(CONF_POWER_BY_SPEED, ""))
+    except ValueError as err:
+        raise SchemaFlowError("invalid_power_by_speed") from err
+    return user_input
+
+
 OPTIONS_FLOW = {
     "init": SchemaFlowFormStep(next_step="simple_options"),
-    "simple_options": SchemaFlowFormStep(SIMPLE_OPTIONS_SCHEMA),
+    "simple_options": SchemaFlowFormStep(
+        SIMPLE_OPTIONS_SCHEMA, validate_user_input=validate_options
+    ),
 }
 
 
@@ -86,9 +134,15 @@ class ConfigFlow(ConfigFlow, domain=DOMAIN):
 
         try:
             device = Bayernluefter(user_input[CONF_HOST], session)
-            await device.update()
-        except ValueError:
+            await device.probe()
+        except DeviceUnreachableError:
             errors["base"] = "cannot_connect"
+        except LegacyFirmwareError:
+            errors["base"] = "legacy_firmware"
+        except MalformedResponseError:
+            errors["base"] = "malformed_response"
+        except NotBayernluefterError:
+            errors["base"] = "not_bayernluefter"
         else:
             user_input[CONF_MAC] = format_mac(device.data["MAC"])
             await self.async_set_unique_id(user_input[CONF_MAC])
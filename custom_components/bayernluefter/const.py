@@ -3,3 +3,12 @@
 DOMAIN = "bayernluefter"
 
 DEFAULT_SCAN_INTERVAL = 10  # seconds
+
+CONF_COMFORT_CONTROL = "comfort_control"
+CONF_TARGET_HUMIDITY = "target_humidity"
+CONF_VERIFY_COMMANDS = "verify_commands"
+CONF_MQTT_TOPIC = "mqtt_topic"
+CONF_JOURNAL = "journal"
+CONF_POWER_BY_SPEED = "power_by_speed"
+
+DEFAULT_TARGET_HUMIDITY = 55  # percent
@@ -39,6 +39,19 @@ class FanMode(StrEnum):
 
 SYSTEM_MODES_WITH_AUTO = {SystemMode.Kellermode, SystemMode.Behaglichkeitsmode}
 
+PRESET_MODES = [FanMode.Timer]
+PRESET_MODES_WITH_AUTO = [FanMode.Timer, FanMode.Auto]
+
+# the mapping between speed levels and percentages is fixed, compute it once
+SPEED_TO_PERCENTAGE = {
+    speed: ranged_value_to_percentage(FAN_SPEED_RANGE, speed)
+    for speed in range(FAN_SPEED_RANGE[1] + 1)
+}
+PERCENTAGE_TO_SPEED = tuple(
+    int(percentage_to_ranged_value(FAN_SPEED_RANGE, percentage))
+    for percentage in range(101)
+)
+
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up fan entries."""
@@ -72,9 +85,13 @@ class BayernluefterFan(BayernluefterEntity, FanEntity):
     ) -> None:
         """Initialize a fan entity for a Bayernluefter device."""
         super().__init__(coordinator, self.entity_description)
-        self._attr_preset_modes = [FanMode.Timer]
+
+    @property
+    def preset_modes(self) -> list[str]:
+        """Return the preset modes supported in the current system mode."""
         if self._device.data.get("SystemMode") in SYSTEM_MODES_WITH_AUTO:
-            self._attr_preset_modes.append(FanMode.Auto)
+            return PRESET_MODES_WITH_AUTO
+        return PRESET_MODES
 
     @property
     def is_on(self) -> bool:
@@ -82,11 +99,9 @@ class BayernluefterFan(BayernluefterEntity, FanEntity):
         return self._device.data.get("SystemOn", False)
 
     @property
-    def percentage(self) -> int:
+    def percentage(self) -> int | None:
         """Return the speed of the fan-"""
-        return ranged_value_to_percentage(
-            FAN_SPEED_RANGE, self._device.data.get("Speed_Out", 0)
-        )
+        return SPEED_TO_PERCENTAGE.get(self._device.data.get("Speed_Out", 0))
 
     @property
     def preset_mode(self) -> str | None:
@@ -101,12 +116,13 @@ class BayernluefterFan(BayernluefterEntity, FanEntity):
 
     async def async_set_percentage(self, percentage: int) -> None:
         """Set the speed percentage of the fan."""
-        await self._device.power_on()
-        await self._async_set_percentage(percentage)
+        with self._command_errors():
+            await self._device.power_on()
+            await self._async_set_percentage(percentage)
         await self.coordinator.async_refresh()
 
     async def _async_set_percentage(self, percentage: int) -> None:
-        speed = int(percentage_to_ranged_value(FAN_SPEED_RANGE, percentage))
+        speed = PERCENTAGE_TO_SPEED[percentage]
         if speed == 0:
             await self._device.power_off()
         else:
@@ -114,7 +130,8 @@ class BayernluefterFan(BayernluefterEntity, FanEntity):
 
     async def async_set_preset_mode(self, preset_mode: str) -> None:
         """Set the preset mode of the fan."""
-        await self._async_set_preset_mode(preset_mode)
+        with self._command_errors():
+            await self._async_set_preset_mode(preset_mode)
 
     async def _async_set_preset_mode(self, preset_mode: str) -> None:
         if preset_mode == FanMode.Auto:
@@ -133,19 +150,22 @@ class BayernluefterFan(BayernluefterEntity, FanEntity):
         **kwargs: Any,
     ) -> None:
         """Turn on the fan."""
-        await self._device.power_on()
-        if percentage is not None:
-            await self._async_set_percentage(percentage)
-        if preset_mode is not None:
-            await self._async_set_preset_mode(preset_mode)
+        with self._command_errors():
+            await self._device.power_on()
+            if percentage is not None:
+                await self._async_set_percentage(percentage)
+            if preset_mode is not None:
+                await self._async_set_preset_mode(preset_mode)
         await self.coordinator.async_refresh()
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the fan off."""
-        await self._device.power_off()
+        with self._command_errors():
+            await self._device.power_off()
         await self.coordinator.async_refresh()
 
     async def async_toggle(self, **kwargs: Any) -> None:
         """Toggle the fan."""
-        await self._device.power_toggle()
+        with self._command_errors():
+            await self._device.power_toggle()
         await self.coordinator.async_refresh()
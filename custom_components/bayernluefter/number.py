@@ -96,4 +96,5 @@ class BayernluefterNumber(BayernluefterEntity, NumberEntity):
 
     async def async_set_native_value(self, value: float) -> None:
         """Update the native value."""
-        await self.entity_description.value_fn(self._device, value)
+        with self._command_errors():
+            await self.entity_description.value_fn(self._device, value)
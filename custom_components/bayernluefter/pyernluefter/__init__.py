@@ -1,17 +1,25 @@
 """Connect to a Bayernluefter."""
 
+import asyncio
 import logging
+import time
 import aiohttp
-import json
 from http import HTTPStatus
 from enum import Enum
 from dataclasses import dataclass
+from datetime import datetime
 
-from typing import Dict
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Iterable
 
 from .convert import convert
+from .health import DeviceHealth
+from .parse import ParseResult, decode_body, parse_export
+
+if TYPE_CHECKING:
+    from .replay import Recorder
 
 ENDPOINT_JSON = "/index.html?export=live"
+ENDPOINT_HTML = "/index.html"  # web page, used to detect legacy firmware
 ENDPOINT_POWER_ON = "?power=on"
 ENDPOINT_POWER_OFF = "?power=off"
 ENDPOINT_BUTTON_POWER = "?button=power"
@@ -27,6 +35,44 @@ ENDPOINT_SPEED_ANTI_FREEZE = "?speedFrM={}"
 
 SERVER_URL = "https://www.bayernluft.de"
 
+# verification of commands if verify_commands is enabled
+COMMAND_ATTEMPTS = 3
+COMMAND_VERIFY_DELAY = 0.5  # seconds, doubled for every attempt
+
+
+PROBE_TIMEOUT = 5  # seconds
+
+
+class BayernluefterError(Exception):
+    """Base class of all errors raised by this library."""
+
+
+class DeviceUnreachableError(BayernluefterError):
+    """Raised if the device does not answer."""
+
+
+class NotBayernluefterError(BayernluefterError, ValueError):
+    """Raised if the host answers, but is not a Bayernluefter."""
+
+
+class LegacyFirmwareError(BayernluefterError, ValueError):
+    """Raised if the firmware of the device lacks the JSON export."""
+
+
+class MalformedResponseError(BayernluefterError, ValueError):
+    """Raised if the export does not contain any usable field."""
+
+
+class CommandNotAppliedError(BayernluefterError):
+    """Raised if a verified command was not applied by the device."""
+
+
+class Endpoint(Enum):
+    """Data sources which can be fetched in a poll cycle."""
+
+    LIVE = "live"  # live export of the device
+    LATEST_VERSIONS = "latest_versions"  # firmware versions from Bayernluft server
+
 
 class UpdateTarget(Enum):
     WLAN32 = "wlan32"
@@ -64,20 +110,60 @@ def construct_url(ip_address: str) -> str:
 class Bayernluefter:
     """Interface to communicate with the Bayernluefter."""
 
-    def __init__(self, ip, session: aiohttp.ClientSession) -> None:
+    def __init__(
+        self, ip, session: aiohttp.ClientSession, verify_commands: bool = False
+    ) -> None:
         """Initialize the object."""
         self.url = construct_url(ip)
         self._session = session
+        self.verify_commands = verify_commands
+        self.command_latency: float | None = None  # of last verified command [s]
+        self.failed_commands = 0
+        self._verification: asyncio.Task | None = None
+        # fetches the state to verify commands, a coordinator can route it
+        # through its own refresh to process the snapshots
+        self.verify_refresh: Callable[[], Awaitable[Any]] = self.update
         self._data = {}  # type: Dict[str, Any]
         self._latest_version = {}
         self._update_target: UpdateTarget | None = None
+        self.recorder: "Recorder | None" = None
+        self.partial_responses = 0  # number of truncated or malformed exports
+        self.last_response_complete = True
+        self._last_fetch: Dict[Endpoint, float] = {}
+        self.device_time: datetime | None = None  # local time of the device
+        self.clock_offset: float | None = None  # device clock - local clock [s]
+        self.rtt: float | None = None  # request round trip time [s]
+        self.stale = False  # True if the last snapshot repeated the previous one
+        self.health = DeviceHealth()
 
     async def update(self) -> None:
-        # try to get JSON response
-        data = json.loads(await self._send_request(ENDPOINT_JSON))
+        start = time.monotonic()
+        start_wall = time.time()
+        try:
+            result = await self._fetch_export()
+        except Exception:
+            self.health.record_failure()
+            raise
+        self.rtt = time.monotonic() - start
 
         # convert into native types
-        self._data = {key: convert(key, value) for key, value in data.items()}
+        data = {key: convert(key, value) for key, value in result.data.items()}
+
+        # the device renders its clock somewhere between request and response
+        self._update_device_time(data, start_wall + self.rtt / 2)
+
+        self.last_response_complete = result.complete
+        if result.complete:
+            self._data = data
+        else:
+            # keep the last known values of the fields which got lost
+            self.partial_responses += 1
+            _LOGGER.debug(
+                f"Incomplete response, salvaged {len(data)} of {len(self._data)} fields"
+            )
+            self._data = {**self._data, **data}
+
+        self.health.record_success(self.rtt, self._data.get("RSSI"))
 
         # estimate update target
         if self._update_target is None:
@@ -86,12 +172,120 @@ class Bayernluefter:
             else:
                 self._update_target = UpdateTarget.WLAN
 
+    async def probe(self, timeout: float | None = None) -> Dict[str, Any]:
+        """Check that the device is reachable and a Bayernluefter.
+
+        Unlike update(), the probe gives up after a short timeout (default
+        PROBE_TIMEOUT) and reports the reason as a typed exception. Returns
+        the converted export.
+        """
+        try:
+            async with asyncio.timeout(PROBE_TIMEOUT if timeout is None else timeout):
+                await self.update()
+        except (aiohttp.ClientError, TimeoutError, OSError) as err:
+            raise DeviceUnreachableError(f"{self.url} is not reachable") from err
+        if "MAC" not in self._data:
+            raise NotBayernluefterError(f"{self.url} does not report a MAC address")
+        return self._data
+
+    async def _fetch_export(self) -> ParseResult:
+        try:
+            text = await self._send_request(ENDPOINT_JSON)
+        except NotBayernluefterError:
+            # checked on every failure, an uploaded template works right away
+            if await self._is_legacy_firmware():
+                raise LegacyFirmwareError(
+                    "Device does not provide the JSON export. "
+                    "Upload doc/export.txt for firmware older than WS32234601."
+                ) from None
+            raise
+
+        try:
+            return parse_export(text)
+        except ValueError as err:
+            raise MalformedResponseError(
+                f"{self.url} sent an invalid export: {err}"
+            ) from err
+
+    async def _is_legacy_firmware(self) -> bool:
+        """Check if the web page of the device is a Bayernluefter page."""
+        try:
+            text = await self._send_request(ENDPOINT_HTML)
+        except NotBayernluefterError:
+            return False
+        return "bayernl" in text.lower()
+
+    def _update_device_time(self, data: Dict, local_time: float) -> None:
+        date = data.get("Date")
+        clock = data.get("Time")
+        if date is None or clock is None:
+            self.stale = False
+            return
+
+        device_time = datetime.combine(date, clock)
+        # a cached page repeats the previous snapshot including its timestamp,
+        # changes within the same second (e.g. after a command) are not stale
+        self.stale = device_time == self.device_time and data == self._data
+        if self.stale:
+            _LOGGER.debug(f"Stale snapshot from {self.url} at {device_time}")
+            return
+
+        self.device_time = device_time
+        self.clock_offset = (
+            device_time - datetime.fromtimestamp(local_time)
+        ).total_seconds()
+
+    def plan_fetch(
+        self, wanted: Iterable[Endpoint], max_age: Dict[Endpoint, float]
+    ) -> list[Endpoint]:
+        """Return the wanted endpoints whose data is older than max_age seconds."""
+        now = time.monotonic()
+        return [
+            endpoint
+            for endpoint in Endpoint
+            if endpoint in wanted
+            and (
+                endpoint not in self._last_fetch
+                or now - self._last_fetch[endpoint] >= max_age.get(endpoint, 0)
+            )
+        ]
+
+    async def fetch(self, endpoints: Iterable[Endpoint]) -> None:
+        """Fetch the given endpoints in one go using the shared session."""
+        for endpoint in endpoints:
+            if endpoint == Endpoint.LIVE:
+                await self.update()
+            elif endpoint == Endpoint.LATEST_VERSIONS:
+                # the update target is known after the first live update
+                if self._update_target is None:
+                    await self.poll_latest_versions()
+                else:
+                    await self._poll_latest_version(self._update_target)
+            self._last_fetch[endpoint] = time.monotonic()
+
     async def _send_request(self, target):
         url = f"{self.url}{target}"
-        async with self._session.get(url) as response:
-            if response.status != HTTPStatus.OK:
-                raise ValueError("Server does not support Bayernluefter protocol.")
-            return await response.text(encoding="ascii", errors="ignore")
+        timeout = aiohttp.ClientTimeout(total=self.health.timeout)
+        async with self._session.get(url, timeout=timeout) as response:
+            if response.status == HTTPStatus.NOT_FOUND:
+                raise NotBayernluefterError(
+                    "Server does not support Bayernluefter protocol."
+                )
+            # other errors, e.g. 503 of a busy device, are worth a retry
+            response.raise_for_status()
+            chunks = []
+            truncated = False
+            try:
+                async for chunk in response.content.iter_any():
+                    chunks.append(chunk)
+            except aiohttp.ClientPayloadError:
+                # connection dropped mid-body, parse what we got
+                _LOGGER.debug(f"Truncated response for {target}")
+                truncated = True
+        raw = b"".join(chunks)
+        if self.recorder is not None:
+            self.recorder.record(target, raw, truncated)
+        return decode_body(raw)
 
     @property
     def data(self) -> Dict:
@@ -99,35 +293,97 @@ class Bayernluefter:
         return self._data
 
     async def power_on(self):
-        await self._send_request(ENDPOINT_POWER_ON)
+        await self._command(ENDPOINT_POWER_ON, lambda data: data.get("SystemOn"))
 
     async def power_off(self):
-        await self._send_request(ENDPOINT_POWER_OFF)
+        await self._command(
+            ENDPOINT_POWER_OFF, lambda data: data.get("SystemOn") is False
+        )
 
     async def power_toggle(self):
-        await self._send_request(ENDPOINT_BUTTON_POWER)
+        before = self._data.get("SystemOn")
+        await self._command(
+            ENDPOINT_BUTTON_POWER,
+            lambda data: data.get("SystemOn") != before,
+            resend=False,
+        )
 
     async def timer_toggle(self):
-        await self._send_request(ENDPOINT_BUTTON_TIMER)
+        before = self._data.get("TimerActiv")
+        await self._command(
+            ENDPOINT_BUTTON_TIMER,
+            lambda data: data.get("TimerActiv") != before,
+            resend=False,
+        )
 
     async def reset_speed(self):
-        await self._send_request(ENDPOINT_SPEED.format(0))
+        await self._command(
+            ENDPOINT_SPEED.format(0), lambda data: data.get("SpeedFrozen") is False
+        )
 
     async def set_speed(self, level: int):
         assert 1 <= level <= 10, "Level must be between 1 and 10"
-        await self._send_request(ENDPOINT_SPEED.format(level))
+        await self._command(
+            ENDPOINT_SPEED.format(level), lambda data: data.get("Speed_Out") == level
+        )
 
     async def set_speed_in(self, level: int):
         assert 0 <= level <= 10, "Level must be between 0 and 10"
-        await self._send_request(ENDPOINT_SPEED_IN.format(level))
+        await self._command(
+            ENDPOINT_SPEED_IN.format(level), lambda data: data.get("Speed_In") == level
+        )
 
     async def set_speed_out(self, level: int):
         assert 0 <= level <= 10, "Level must be between 0 and 10"
-        await self._send_request(ENDPOINT_SPEED_OUT.format(level))
+        await self._command(
+            ENDPOINT_SPEED_OUT.format(level),
+            lambda data: data.get("Speed_Out") == level,
+        )
 
     async def set_speed_anti_freeze(self, level: int):
         assert 0 <= level <= 50, "Level must be between 0 and 50"
-        await self._send_request(ENDPOINT_SPEED_ANTI_FREEZE.format(level))
+        await self._command(
+            ENDPOINT_SPEED_ANTI_FREEZE.format(level),
+            lambda data: data.get("Speed_AntiFreeze") == level,
+        )
+
+    async def _command(
+        self,
+        target: str,
+        applied: Callable[[Dict[str, Any]], bool],
+        resend: bool = True,
+    ) -> None:
+        """Send a command, verify it if verify_commands is enabled.
+
+        The command is verified by polling the export until `applied` returns
+        True, with increasing delays. It is only sent again if `resend` is set,
+        toggles must not be repeated.
+        """
+        start = time.monotonic()
+        await self._send_request(target)
+        if not self.verify_commands:
+            return
+
+        for attempt in range(COMMAND_ATTEMPTS):
+            await asyncio.sleep(COMMAND_VERIFY_DELAY * 2**attempt)
+            await self._verify_update()
+            if applied(self._data):
+                self.command_latency = time.monotonic() - start
+                return
+            if resend and attempt + 1 < COMMAND_ATTEMPTS:
+                _LOGGER.debug(f"Command {target} not applied yet, sending again")
+                await self._send_request(target)
+
+        self.failed_commands += 1
+        raise CommandNotAppliedError(
+            f"Command {target} not applied after {COMMAND_ATTEMPTS} attempts"
+        )
+
+    async def _verify_update(self) -> None:
+        """Update, sharing one request between concurrent verifications."""
+        if self._verification is None or self._verification.done():
+            self._verification = asyncio.ensure_future(self.verify_refresh())
+        await asyncio.shield(self._verification)
 
     async def update_check(self):
         await self._send_request(ENDPOINT_UPDATE_CHECK)
@@ -0,0 +1,70 @@
+"""Health estimation of a Bayernluefter connection."""
+
+# weight of a new sample in the moving averages
+SMOOTHING = 0.2
+
+# RSSI range mapped to 0..1
+RSSI_BAD = -90  # dBm
+RSSI_GOOD = -55  # dBm
+
+# round trip time range mapped to 1..0
+RTT_GOOD = 0.2  # seconds
+RTT_BAD = 3.0  # seconds
+
+DEFAULT_TIMEOUT = 10  # seconds
+
+HEALTHY = 70  # score above which a device is polled normally
+DEGRADED = 40  # score above which a device is polled at half rate
+
+
+def _clamp(x: float) -> float:
+    return max(0.0, min(1.0, x))
+
+
+class DeviceHealth:
+    """Score from 0 (unusable) to 100 (perfect) from RSSI, RTT and failures."""
+
+    def __init__(self) -> None:
+        self.rssi: int | None = None
+        self.rtt: float | None = None  # moving average [s]
+        self.failure_rate = 0.0  # moving average of failed requests
+
+    def record_success(self, rtt: float, rssi: int | None) -> None:
+        self.rtt = rtt if self.rtt is None else self.rtt + SMOOTHING * (rtt - self.rtt)
+        if rssi is not None:
+            self.rssi = rssi
+        self.failure_rate -= SMOOTHING * self.failure_rate
+
+    def record_failure(self) -> None:
+        self.failure_rate += SMOOTHING * (1 - self.failure_rate)
+
+    @property
+    def score(self) -> int:
+        rssi = (
+            1.0
+            if self.rssi is None
+            else _clamp((self.rssi - RSSI_BAD) / (RSSI_GOOD - RSSI_BAD))
+        )
+        rtt = (
+            1.0
+            if self.rtt is None
+            else _clamp((RTT_BAD - self.rtt) / (RTT_BAD - RTT_GOOD))
+        )
+        return round(100 * (0.3 * rssi + 0.3 * rtt + 0.4 * (1 - self.failure_rate)))
+
+    @property
+    def interval_factor(self) -> int:
+        """Multiplier for the poll interval, unhealthy devices are polled less."""
+        score = self.score
+        if score >= HEALTHY:
+            return 1
+        if score >= DEGRADED:
+            return 2
+        return 4
+
+    @property
+    def timeout(self) -> float:
+        """Request timeout, unhealthy devices get more time to answer."""
+        if self.score >= HEALTHY:
+            return DEFAULT_TIMEOUT
+        return 2 * DEFAULT_TIMEOUT
@@ -0,0 +1,228 @@
+"""Compact binary journal of converted Bayernluefter snapshots.
+
+Each snapshot is packed into a fixed-size record, so a journal can be read
+with a memory map and searched by time with bisection. Files are rotated
+when they reach a maximum size.
+"""
+
+import math
+import mmap
+import os
+import struct
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterator, List
+
+from .convert import SystemMode
+
+MAGIC = b"BLJ1"
+HEADER = struct.Struct("<4sH")  # magic, record size
+
+FLOAT_FIELDS = (
+    "Temp_In",
+    "Temp_Out",
+    "Temp_Fresh",
+    "rel_Humidity_In",
+    "rel_Humidity_Out",
+    "abs_Humidity_In",
+    "abs_Humidity_Out",
+    "Efficiency",
+)
+SMALL_INT_FIELDS = ("RSSI", "Speed_In", "Speed_Out", "Speed_AntiFreeze")
+BOOL_FIELDS = (
+    "SystemOn",
+    "FrostschutzAktiv",
+    "SpeedFrozen",
+    "AbtauMode",
+    "TimerActiv",
+    "VermieterMode",
+    "QuerlueftungAktiv",
+)
+SYSTEM_MODES = tuple(SystemMode)
+
+# timestamp, floats, small ints, Humidity_Transport, SystemMode, bools
+RECORD = struct.Struct(
+    "<d"
+    + "f" * len(FLOAT_FIELDS)
+    + "b" * len(SMALL_INT_FIELDS)
+    + "i"
+    + "B"
+    + "B" * len(BOOL_FIELDS)
+)
+
+# markers for missing values
+NO_SMALL_INT = -128
+NO_INT = -(2**31)
+NO_ENUM = 255
+NO_BOOL = 255
+
+DEFAULT_MAX_FILE_SIZE = 16 * 1024 * 1024  # bytes
+DEFAULT_MAX_FILES = 8
+
+
+def _small_int(value: Any) -> int:
+    if value is None:
+        return NO_SMALL_INT
+    return max(-127, min(127, value))
+
+
+def _int(value: Any) -> int:
+    if value is None:
+        return NO_INT
+    return max(NO_INT + 1, min(2**31 - 1, value))
+
+
+def pack(snapshot: Dict[str, Any], timestamp: float) -> bytes:
+    """Pack a converted snapshot into a record.
+
+    Integers are clamped to the range of their field. Raises ValueError if a
+    value has an unexpected type.
+    """
+    mode = snapshot.get("SystemMode")
+    try:
+        return RECORD.pack(
+            timestamp,
+            *(
+                math.nan if snapshot.get(key) is None else snapshot[key]
+                for key in FLOAT_FIELDS
+            ),
+            *(_small_int(snapshot.get(key)) for key in SMALL_INT_FIELDS),
+            _int(snapshot.get("Humidity_Transport")),
+            SYSTEM_MODES.index(mode) if mode in SYSTEM_MODES else NO_ENUM,
+            *(
+                NO_BOOL if snapshot.get(key) is None else int(snapshot[key])
+                for key in BOOL_FIELDS
+            ),
+        )
+    except (struct.error, TypeError) as err:
+        raise ValueError(f"Snapshot cannot be packed: {err}") from err
+
+
+def unpack(values: tuple) -> Dict[str, Any]:
+    """Convert unpacked record values back into a snapshot."""
+    snapshot: Dict[str, Any] = {"timestamp": values[0]}
+    i = 1
+    for key in FLOAT_FIELDS:
+        # values are stored as 32 bit floats, the device reports 1 decimal
+        snapshot[key] = None if math.isnan(values[i]) else round(values[i], 2)
+        i += 1
+    for key in SMALL_INT_FIELDS:
+        snapshot[key] = None if values[i] == NO_SMALL_INT else values[i]
+        i += 1
+    snapshot["Humidity_Transport"] = None if values[i] == NO_INT else values[i]
+    i += 1
+    snapshot["SystemMode"] = (
+        None if values[i] >= len(SYSTEM_MODES) else SYSTEM_MODES[values[i]]
+    )
+    i += 1
+    for key in BOOL_FIELDS:
+        snapshot[key] = None if values[i] == NO_BOOL else bool(values[i])
+        i += 1
+    return snapshot
+
+
+def journal_files(path: str) -> List[str]:
+    """Return the files of a journal, oldest first."""
+    rotated = []
+    n = 1
+    while os.path.exists(f"{path}.{n}"):
+        rotated.append(f"{path}.{n}")
+        n += 1
+    files = list(reversed(rotated))
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+class JournalWriter:
+    """Append snapshots of one device to a journal file.
+
+    The current file is `path`, rotated files are `path.1` (newest) to
+    `path.<max_files - 1>` (oldest).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_file_size: int = DEFAULT_MAX_FILE_SIZE,
+        max_files: int = DEFAULT_MAX_FILES,
+    ) -> None:
+        self.path = path
+        self._max_file_size = max_file_size
+        self._max_files = max_files
+
+    def append(self, snapshot: Dict[str, Any], timestamp: float) -> None:
+        """Append a snapshot, timestamp is in seconds since epoch."""
+        record = pack(snapshot, timestamp)
+        if (
+            os.path.exists(self.path)
+            and os.path.getsize(self.path) + len(record) > self._max_file_size
+        ):
+            self._rotate()
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "ab") as f:
+            if f.tell() == 0:
+                f.write(HEADER.pack(MAGIC, RECORD.size))
+            f.write(record)
+
+    def _rotate(self) -> None:
+        oldest = f"{self.path}.{self._max_files - 1}"
+        if os.path.exists(oldest):
+            os.remove(oldest)
+        for n in range(self._max_files - 2, 0, -1):
+            if os.path.exists(f"{self.path}.{n}"):
+                os.replace(f"{self.path}.{n}", f"{self.path}.{n + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+
+class JournalReader:
+    """Read snapshots of a journal including rotated files."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def scan(
+        self, start: float | None = None, end: float | None = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield the snapshots with start <= timestamp <= end, oldest first."""
+        for file in journal_files(self.path):
+            yield from self._scan_file(file, start, end)
+
+    def _scan_file(
+        self, file: str, start: float | None, end: float | None
+    ) -> Iterator[Dict[str, Any]]:
+        with open(file, "rb") as f:
+            if os.fstat(f.fileno()).st_size <= HEADER.size:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                magic, record_size = HEADER.unpack_from(mm, 0)
+                if magic != MAGIC or record_size != RECORD.size:
+                    raise ValueError(f"{file} is not a compatible journal")
+                count = (len(mm) - HEADER.size) // RECORD.size
+                timestamps = _Timestamps(mm, count)
+                first = 0 if start is None else bisect_left(timestamps, start)
+                last = count if end is None else bisect_right(timestamps, end)
+                offset = HEADER.size + first * RECORD.size
+                view = memoryview(mm)[offset : HEADER.size + last * RECORD.size]
+                try:
+                    for values in RECORD.iter_unpack(view):
+                        yield unpack(values)
+                finally:
+                    view.release()
+
+
+class _Timestamps:
+    """Sequence view on the record timestamps for bisection."""
+
+    _TIMESTAMP = struct.Struct("<d")
+
+    def __init__(self, mm: mmap.mmap, count: int) -> None:
+        self._mm = mm
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> float:
+        offset = HEADER.size + index * RECORD.size
+        return self._TIMESTAMP.unpack_from(self._mm, offset)[0]
@@ -0,0 +1,44 @@
+"""Tolerant parsing of the Bayernluefter export."""
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Dict
+
+# a complete "key": "value" pair, a truncated trailing value never matches
+_PAIR_RE = re.compile(r'"(\w+)"\s*:\s*"([^"]*)"')
+
+
+@dataclass
+class ParseResult:
+    """Raw export fields and whether the response was complete."""
+
+    data: Dict[str, str]
+    complete: bool
+
+
+def decode_body(raw: bytes) -> str:
+    """Decode a response body.
+
+    Newer firmware sends UTF-8, older firmware latin-1. Latin-1 decoding never
+    fails, therefore it is used as fallback.
+    """
+    try:
+        return raw.decode("utf-8")
+    except UnicodeDecodeError:
+        return raw.decode("latin-1")
+
+
+def parse_export(text: str) -> ParseResult:
+    """Parse the JSON export, salvaging complete fields of broken responses."""
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = dict(_PAIR_RE.findall(text))
+        if not data:
+            raise ValueError("Response does not contain any export field.")
+        return ParseResult(data=data, complete=False)
+
+    if not isinstance(data, dict):
+        raise ValueError("Response is not a JSON object.")
+    return ParseResult(data=data, complete=True)
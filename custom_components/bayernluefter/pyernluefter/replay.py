@@ -0,0 +1,208 @@
+"""Record and replay raw Bayernluefter responses.
+
+A recording is a line-delimited JSON file with one response per line. The raw
+body is stored as latin-1 string, which maps every byte to one character, so
+bodies are reproduced byte by byte including invalid encodings.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import AsyncIterator, Deque, Dict, Iterator, List
+
+import aiohttp
+
+_LOGGER = logging.getLogger(__name__)
+
+# number of responses buffered before they are written
+DEFAULT_BUFFER_SIZE = 32
+
+
+@dataclass
+class Record:
+    """A single recorded response."""
+
+    timestamp: float
+    target: str
+    body: bytes
+    truncated: bool = False  # connection dropped before the body was complete
+
+
+class ReplayExhausted(Exception):
+    """Raised if a replay session has no more recorded responses."""
+
+
+def read_records(path: str) -> Iterator[Record]:
+    """Read records from a line-delimited recording file."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            yield Record(
+                timestamp=entry["t"],
+                target=entry["r"],
+                body=entry["b"].encode("latin-1"),
+                truncated=entry.get("x", False),
+            )
+
+
+class Recorder:
+    """Append raw responses with timestamps to a line-delimited file.
+
+    Assign an instance to `Bayernluefter.recorder` to capture all responses.
+    Responses are buffered in memory and written by a worker thread, so
+    recording does not block the event loop. Call `close()` to write the
+    remaining responses.
+    """
+
+    def __init__(self, path: str, buffer_size: int = DEFAULT_BUFFER_SIZE) -> None:
+        self._path = path
+        self._buffer_size = buffer_size
+        self._buffer: List[str] = []
+        # a single worker keeps the written lines in recorded order
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def record(self, target: str, body: bytes, truncated: bool = False) -> None:
+        entry = {"t": round(time.time(), 3), "r": target, "b": body.decode("latin-1")}
+        if truncated:
+            entry["x"] = True
+        self._buffer.append(json.dumps(entry, separators=(",", ":")) + "\n")
+        if len(self._buffer) >= self._buffer_size:
+            self.flush()
+
+    def flush(self) -> Future:
+        """Hand the buffered responses to the writer, returns its future."""
+        lines, self._buffer = self._buffer, []
+        future = self._executor.submit(self._write, lines)
+        future.add_done_callback(self._log_error)
+        return future
+
+    def close(self) -> None:
+        """Write the buffered responses and wait until they are written."""
+        self.flush()
+        self._executor.shutdown(wait=True)
+
+    def _write(self, lines: List[str]) -> None:
+        if lines:
+            with open(self._path, "a", encoding="utf-8") as f:
+                f.writelines(lines)
+
+    def _log_error(self, future: Future) -> None:
+        if future.exception() is not None:
+            _LOGGER.error(f"Failed to write {self._path}: {future.exception()}")
+
+
+class _ReplayContent:
+    def __init__(self, record: Record) -> None:
+        self._record = record
+
+    async def iter_any(self) -> AsyncIterator[bytes]:
+        yield self._record.body
+        if self._record.truncated:
+            raise aiohttp.ClientPayloadError("Recorded response was truncated")
+
+
+class _ReplayResponse:
+    def __init__(self, record: Record) -> None:
+        self.status = HTTPStatus.OK
+        self.content = _ReplayContent(record)
+
+    def raise_for_status(self) -> None:
+        pass
+
+
+class ReplaySession:
+    """Stand-in for `aiohttp.ClientSession` serving recorded responses.
+
+    Responses are served per request target in recorded order. The original
+    gaps between responses are reproduced, divided by `speedup`. Use
+    `speedup=math.inf` to replay as fast as possible.
+    """
+
+    def __init__(self, path: str, speedup: float = math.inf) -> None:
+        self._speedup = speedup
+        self._records: Dict[str, Deque[Record]] = defaultdict(deque)
+        for record in read_records(path):
+            self._records[record.target].append(record)
+        self._last_timestamp: float | None = None
+
+    def remaining(self, target: str) -> int:
+        return len(self._records.get(target, ()))
+
+    def get(self, url: str, **kwargs) -> "_ReplayRequest":
+        # only the request target (path + query) is relevant for lookup
+        target = next((t for t in self._records if url.endswith(t)), None)
+        if target is None or not self._records[target]:
+            raise ReplayExhausted(f"No recorded response left for {url}")
+        record = self._records[target].popleft()
+        return _ReplayRequest(self, record)
+
+    async def _pace(self, record: Record) -> None:
+        if self._last_timestamp is not None and self._speedup != math.inf:
+            delay = (record.timestamp - self._last_timestamp) / self._speedup
+            if delay > 0:
+                await asyncio.sleep(delay)
+        self._last_timestamp = record.timestamp
+
+
+class _ReplayRequest:
+    """Async context manager pacing the replay before returning a response."""
+
+    def __init__(self, session: ReplaySession, record: Record) -> None:
+        self._session = session
+        self._record = record
+
+    async def __aenter__(self) -> _ReplayResponse:
+        await self._session._pace(self._record)
+        return _ReplayResponse(self._record)
+
+    async def __aexit__(self, *args) -> None:
+        pass
+
+
+@dataclass
+class ReplayStats:
+    """Result of a replay run."""
+
+    updates: int
+    failures: int
+    duration: float
+
+    @property
+    def updates_per_second(self) -> float:
+        return self.updates / self.duration if self.duration > 0 else math.inf
+
+
+async def replay(path: str, speedup: float = math.inf, on_update=None) -> ReplayStats:
+    """Replay a recording through `Bayernluefter.update()`.
+
+    `on_update` is called with the device after every successful update,
+    e.g. to drive a coordinator or to inspect converted values.
+    """
+    from . import Bayernluefter, ENDPOINT_JSON
+
+    session = ReplaySession(path, speedup)
+    device = Bayernluefter("replay", session)
+    updates = failures = 0
+    start = time.perf_counter()
+    while session.remaining(ENDPOINT_JSON):
+        try:
+            await device.update()
+        except ValueError:
+            # malformed responses are part of what we want to reproduce
+            failures += 1
+            continue
+        updates += 1
+        if on_update is not None:
+            on_update(device)
+    return ReplayStats(
+        updates=updates, failures=failures, duration=time.perf_counter() - start
+    )
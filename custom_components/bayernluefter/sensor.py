@@ -3,14 +3,18 @@ Support for Bayernluefter sensors.
 """
 
 import logging
+from collections.abc import Callable
+from dataclasses import dataclass
 from typing import Final
-from enum import Enum
 
 from homeassistant.const import (
     EntityCategory,
     PERCENTAGE,
     SIGNAL_STRENGTH_DECIBELS_MILLIWATT,
+    UnitOfEnergy,
+    UnitOfMass,
     UnitOfTemperature,
+    UnitOfTime,
 )
 from homeassistant.components.sensor import (
     SensorEntity,
@@ -21,6 +25,15 @@ from homeassistant.components.sensor import (
 from homeassistant.helpers.typing import StateType
 
 from .pyernluefter.convert import SystemMode
+from .accumulators import (
+    ENERGY,
+    HUMIDITY_TRANSPORT,
+    RUNTIME,
+    RUNTIME_DEFROST,
+    RUNTIME_FROST_PROTECTION,
+    RUNTIME_SPEED,
+    SPEED_LEVELS,
+)
 
 from . import (
     BayernluefterEntity,
@@ -140,6 +153,140 @@ SENSOR_ENTITIES: tuple[SensorEntityDescription, ...] = (
 )
 
 
+@dataclass(frozen=True, kw_only=True)
+class BayernluefterComputedSensorEntityDescription(SensorEntityDescription):
+    """Describes a sensor for values which are not part of the export."""
+
+    value_fn: Callable[[DataUpdateCoordinator], StateType]
+
+
+def _accumulated(key: str) -> Callable[[DataUpdateCoordinator], StateType]:
+    return lambda coordinator: coordinator.accumulators.values[key]
+
+
+COMPUTED_SENSOR_ENTITIES: tuple[
+    BayernluefterComputedSensorEntityDescription, ...
+] = (
+    BayernluefterComputedSensorEntityDescription(
+        key="ClockOffset",
+        name="Clock_Offset",
+        icon="mdi:clock-alert-outline",
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: coordinator._device.clock_offset,
+    ),
+    BayernluefterComputedSensorEntityDescription(
+        key="RoundTripTime",
+        name="Round_Trip_Time",
+        icon="mdi:timer-outline",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: (
+            None if coordinator._device.rtt is None else coordinator._device.rtt * 1000
+        ),
+    ),
+    BayernluefterComputedSensorEntityDescription(
+        key="CommandLatency",
+        name="Command_Latency",
+        icon="mdi:timer-check-outline",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: (
+            None
+            if coordinator._device.command_latency is None
+            else coordinator._device.command_latency * 1000
+        ),
+    ),
+    BayernluefterComputedSensorEntityDescription(
+        key="Health",
+        name="Connection_Health",
+        icon="mdi:heart-pulse",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda coordinator: coordinator._device.health.score,
+    ),
+    BayernluefterComputedSensorEntityDescription(
+        key="Runtime",
+        name="Runtime",
+        icon="mdi:fan-clock",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.HOURS,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        suggested_display_precision=1,
+        value_fn=_accumulated(RUNTIME),
+    ),
+    BayernluefterComputedSensorEntityDescription(
+        key="Runtime_FrostschutzAktiv",
+        name="Runtime_FrostschutzAktiv",
+        icon="mdi:snowflake-thermometer",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.HOURS,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        suggested_display_precision=1,
+        value_fn=_accumulated(RUNTIME_FROST_PROTECTION),
+    ),
+    BayernluefterComputedSensorEntityDescription(
+        key="Runtime_AbtauMode",
+        name="Runtime_AbtauMode",
+        icon="mdi:snowflake-melt",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.HOURS,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        suggested_display_precision=1,
+        value_fn=_accumulated(RUNTIME_DEFROST),
+    ),
+    BayernluefterComputedSensorEntityDescription(
+        key="Energy",
+        name="Energy_Estimated",
+        # not a measurement, it shall not be offered by the energy dashboard
+        icon="mdi:lightning-bolt-outline",
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        suggested_display_precision=3,
+        value_fn=lambda coordinator: (
+            coordinator.accumulators.values[ENERGY]
+            if coordinator.accumulators.power_by_speed is not None
+            else None
+        ),
+    ),
+    BayernluefterComputedSensorEntityDescription(
+        key="Humidity_Transport_Total",
+        name="Humidity_Transport_Total",
+        icon="mdi:water-outline",
+        native_unit_of_measurement=UnitOfMass.GRAMS,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        suggested_display_precision=0,
+        value_fn=_accumulated(HUMIDITY_TRANSPORT),
+    ),
+    *(
+        BayernluefterComputedSensorEntityDescription(
+            key=f"Runtime_Speed_{level}",
+            name=f"Runtime_Speed_{level}",
+            icon="mdi:fan-clock",
+            device_class=SensorDeviceClass.DURATION,
+            native_unit_of_measurement=UnitOfTime.HOURS,
+            state_class=SensorStateClass.TOTAL_INCREASING,
+            suggested_display_precision=1,
+            entity_registry_enabled_default=False,
+            value_fn=_accumulated(RUNTIME_SPEED.format(level)),
+        )
+        for level in SPEED_LEVELS
+    ),
+)
+
+
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up sensor entries."""
     coordinator: DataUpdateCoordinator = hass.data[DOMAIN][config_entry.entry_id]
@@ -147,6 +294,10 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
         BayernluefterSensorEntity(coordinator, description)
         for description in SENSOR_ENTITIES
     ]
+    entities.extend(
+        BayernluefterComputedSensorEntity(coordinator, description)
+        for description in COMPUTED_SENSOR_ENTITIES
+    )
     async_add_entities(entities)
 
 
@@ -161,9 +312,37 @@ class BayernluefterSensorEntity(BayernluefterEntity, SensorEntity):
         """Initialize a sensor entity for a Bayernluefter device."""
         super().__init__(coordinator, description)
         self.entity_description = description
+        # only enum sensors need a conversion, decide once instead of per read
+        self._is_enum = description.device_class == SensorDeviceClass.ENUM
 
     @property
     def native_value(self) -> StateType:
         """Return the value reported by the sensor."""
-        value = self._device.data[self.entity_description.key]
-        return value.name if isinstance(value, Enum) else value
+        value = self._device.data[self._key]
+        if self._is_enum and value is not None:
+            return value.name
+        return value
+
+
+class BayernluefterComputedSensorEntity(BayernluefterEntity, SensorEntity):
+    """A sensor for values derived by the integration."""
+
+    entity_description: BayernluefterComputedSensorEntityDescription
+
+    def __init__(
+        self,
+        coordinator: DataUpdateCoordinator,
+        description: BayernluefterComputedSensorEntityDescription,
+    ) -> None:
+        """Initialize a computed sensor entity for a Bayernluefter device."""
+        super().__init__(coordinator, description)
+        self.entity_description = description
+
+    @property
+    def available(self) -> bool:
+        return self._coordinator.last_update_success and self.native_value is not None
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the value derived by the integration."""
+        return self.entity_description.value_fn(self._coordinator)
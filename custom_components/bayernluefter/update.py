@@ -48,6 +48,14 @@ class BayernluefterUpdate(BayernluefterEntity, UpdateEntity):
         super().__init__(coordinator, self.entity_description)
         self._attr_release_url = self._device.wifi_release_url
 
+    async def async_added_to_hass(self) -> None:
+        """Register as consumer of the latest firmware versions."""
+        await super().async_added_to_hass()
+        self._coordinator.firmware_consumers.add(self)
+        self.async_on_remove(
+            lambda: self._coordinator.firmware_consumers.discard(self)
+        )
+
     @property
     def available(self) -> bool:
         return (
@@ -0,0 +1,133 @@
+"""Fixtures for the Bayernluefter tests.
+
+Tests which need Home Assistant use pytest-homeassistant-custom-component.
+They are skipped if it is not installed.
+"""
+
+import asyncio
+import os
+from datetime import timedelta
+from http import HTTPStatus
+from unittest.mock import patch
+
+import pytest
+from aiohttp import ClientResponseError, RequestInfo
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+try:
+    import pytest_homeassistant_custom_component  # noqa: F401
+except ImportError:
+    pytest_plugins = []
+else:
+    pytest_plugins = ["pytest_homeassistant_custom_component"]
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# recorded live exports of a device, see pyernluefter.replay.Recorder
+LIVE_RECORDING = os.path.join(FIXTURES, "live.jsonl")
+# latin-1 export of older firmware, followed by a truncated one
+TRUNCATED_RECORDING = os.path.join(FIXTURES, "truncated.jsonl")
+
+# web page of a firmware without JSON export
+LEGACY_PAGE = "<html><head><title>Bayernl&uuml;fter</title></head></html>"
+
+
+class PageSession:
+    """Session serving a status and body per request target."""
+
+    def __init__(self, pages: dict[str, tuple[int, str]]) -> None:
+        self._pages = pages
+
+    def get(self, url, **kwargs):
+        target = next((t for t in self._pages if url.endswith(t)), None)
+        status, body = self._pages.get(target, (HTTPStatus.NOT_FOUND, ""))
+        return PageResponse(url, status, body)
+
+
+class PageResponse:
+    def __init__(self, url: str, status: int, body: str) -> None:
+        self.url = url
+        self.status = status
+        self.content = self
+        self._body = body.encode()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    def raise_for_status(self) -> None:
+        if self.status >= 400:
+            url = URL(self.url)
+            info = RequestInfo(url, "GET", CIMultiDictProxy(CIMultiDict()), url)
+            raise ClientResponseError(info, (), status=self.status)
+
+    async def iter_any(self):
+        yield self._body
+
+
+class FailingSession:
+    """Session whose requests fail with the given exception or hang."""
+
+    def __init__(self, exception: BaseException | None) -> None:
+        self._exception = exception
+        self.requests = 0
+
+    def get(self, url, **kwargs):
+        self.requests += 1
+        return self
+
+    async def __aenter__(self):
+        if self._exception is None:
+            await asyncio.Event().wait()
+        raise self._exception
+
+    async def __aexit__(self, *args):
+        pass
+
+
+@pytest.fixture
+def coordinator_factory(hass):
+    """Create coordinators whose devices replay a recording."""
+    from custom_components.bayernluefter import BayernluefterDataUpdateCoordinator
+    from custom_components.bayernluefter.pyernluefter import Bayernluefter
+    from custom_components.bayernluefter.pyernluefter.replay import ReplaySession
+
+    def create(recording: str = LIVE_RECORDING) -> BayernluefterDataUpdateCoordinator:
+        session = ReplaySession(recording)
+        return BayernluefterDataUpdateCoordinator(
+            hass,
+            device=Bayernluefter("replay", session),
+            update_interval=timedelta(seconds=10),
+        )
+
+    return create
+
+
+async def setup_entry(hass, session, **kwargs):
+    """Set up a config entry whose device is served by the given session.
+
+    Keyword arguments are passed to the MockConfigEntry.
+    """
+    from homeassistant.const import CONF_HOST
+    from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+    from custom_components.bayernluefter.const import DOMAIN
+
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_HOST: "replay"},
+        version=2,
+        minor_version=0,
+        **kwargs,
+    )
+    entry.add_to_hass(hass)
+    with patch(
+        "custom_components.bayernluefter.async_get_clientsession",
+        return_value=session,
+    ):
+        await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+    return entry
@@ -0,0 +1,163 @@
+"""Tests of the cumulative counters."""
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.bayernluefter.accumulators import (  # noqa: E402
+    ENERGY,
+    HUMIDITY_TRANSPORT,
+    MIN_MAX_GAP,
+    RUNTIME,
+    RUNTIME_DEFROST,
+    RUNTIME_FROST_PROTECTION,
+    RUNTIME_SPEED,
+    Accumulators,
+    parse_power_by_speed,
+)
+
+INTERVAL = 10  # seconds
+
+DATA = {
+    "SystemOn": True,
+    "Speed_Out": 4,
+    "Humidity_Transport": 480,  # g per day
+    "FrostschutzAktiv": False,
+    "AbtauMode": False,
+}
+
+POWER = "2 3 4 5 6 7 8 9 10 11"
+
+
+def feed(accumulators: Accumulators, *snapshots: tuple[float, dict]) -> None:
+    for now, data in snapshots:
+        accumulators.update(data, now, INTERVAL)
+
+
+def test_runtime_per_speed():
+    accumulators = Accumulators()
+
+    feed(
+        accumulators,
+        (0, DATA),
+        (360, DATA),
+        (720, {**DATA, "Speed_Out": 7}),
+        (1080, DATA),
+    )
+
+    # the state of a snapshot lasts until the next one
+    assert accumulators.values[RUNTIME] == pytest.approx(0.3)
+    assert accumulators.values[RUNTIME_SPEED.format(4)] == pytest.approx(0.2)
+    assert accumulators.values[RUNTIME_SPEED.format(7)] == pytest.approx(0.1)
+
+
+def test_switched_off():
+    accumulators = Accumulators()
+
+    feed(accumulators, (0, {**DATA, "SystemOn": False}), (360, DATA))
+
+    assert accumulators.values[RUNTIME] == 0
+    assert accumulators.values[RUNTIME_SPEED.format(4)] == 0
+    assert accumulators.values[HUMIDITY_TRANSPORT] == 0
+
+
+def test_frost_protection_and_defrost():
+    accumulators = Accumulators()
+
+    feed(
+        accumulators,
+        (0, {**DATA, "FrostschutzAktiv": True}),
+        (360, {**DATA, "AbtauMode": True}),
+        (540, DATA),
+    )
+
+    assert accumulators.values[RUNTIME_FROST_PROTECTION] == pytest.approx(0.1)
+    assert accumulators.values[RUNTIME_DEFROST] == pytest.approx(0.05)
+
+
+def test_humidity_transport():
+    accumulators = Accumulators()
+
+    for minutes in range(0, 180, 5):
+        transport = -100 if minutes >= 120 else DATA["Humidity_Transport"]
+        accumulators.update(
+            {**DATA, "Humidity_Transport": transport}, minutes * 60, INTERVAL
+        )
+
+    # 480 g per day for two hours, moisture carried in is not counted
+    assert accumulators.values[HUMIDITY_TRANSPORT] == pytest.approx(40)
+
+
+def test_gap_is_not_integrated():
+    accumulators = Accumulators()
+
+    feed(accumulators, (0, DATA), (MIN_MAX_GAP + 1, DATA), (MIN_MAX_GAP + 61, DATA))
+
+    assert accumulators.values[RUNTIME] == pytest.approx(60 / 3600)
+
+
+def test_gap_limit_follows_interval():
+    accumulators = Accumulators()
+
+    # three intervals of a slow poll are still integrated
+    accumulators.update(DATA, 0, 600)
+    accumulators.update(DATA, 1800, 600)
+    accumulators.update(DATA, 3700, 600)
+
+    assert accumulators.values[RUNTIME] == pytest.approx(0.5)
+
+
+def test_energy_requires_power():
+    accumulators = Accumulators()
+
+    feed(accumulators, (0, DATA), (360, DATA))
+
+    assert accumulators.values[ENERGY] == 0
+
+
+def test_energy():
+    accumulators = Accumulators(power_by_speed=parse_power_by_speed(POWER))
+
+    feed(accumulators, (0, DATA), (360, {**DATA, "Speed_Out": 10}), (720, DATA))
+
+    assert accumulators.values[ENERGY] == pytest.approx((5 + 11) * 0.1 / 1000)
+
+
+def test_restore():
+    accumulators = Accumulators()
+    feed(accumulators, (0, DATA), (360, DATA))
+
+    restored = Accumulators(dict(accumulators.values))
+    # the first snapshot after a restart starts a new integration
+    feed(restored, (10000, DATA), (10360, DATA))
+
+    assert restored.values[RUNTIME] == pytest.approx(0.2)
+    assert restored.values[RUNTIME_SPEED.format(4)] == pytest.approx(0.2)
+    assert restored.values[RUNTIME_SPEED.format(5)] == 0
+
+
+@pytest.mark.parametrize(
+    ("text", "power"),
+    [
+        ("", None),
+        ("  ", None),
+        (POWER, {level: level + 1.0 for level in range(1, 11)}),
+        ("2,5;3 4 5 6 7 8 9 10 11", {1: 2.5, 2: 3.0}),
+    ],
+)
+def test_parse_power_by_speed(text, power):
+    result = parse_power_by_speed(text)
+
+    if power is None:
+        assert result is None
+    else:
+        assert power.items() <= result.items()
+        assert len(result) == 10
+
+
+@pytest.mark.parametrize(
+    "text", ["1 2 3", "2 3 4 5 6 7 8 9 10 -1", "a b c d e f g h i j"]
+)
+def test_parse_invalid_power_by_speed(text):
+    with pytest.raises(ValueError):
+        parse_power_by_speed(text)
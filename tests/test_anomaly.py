@@ -0,0 +1,196 @@
+"""Tests of the detection of degrading heat recovery."""
+
+import json
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from homeassistant.helpers import issue_registry as ir  # noqa: E402
+
+from custom_components.bayernluefter.anomaly import (  # noqa: E402
+    SUSTAINED_TIME,
+    WARMUP_TIME,
+    AnomalyDetector,
+)
+from custom_components.bayernluefter.const import DOMAIN  # noqa: E402
+from custom_components.bayernluefter.pyernluefter.replay import (  # noqa: E402
+    ReplaySession,
+)
+
+from .conftest import LIVE_RECORDING, setup_entry  # noqa: E402
+
+HOUR = 3600
+
+NORMAL = 75.0  # efficiency in percent
+DEGRADED = 65.0
+
+ENTRY_ID = "entry"
+ISSUE_ID = f"efficiency_degraded_{ENTRY_ID}"
+
+
+def snapshot(efficiency: float, speed: int = 4) -> dict:
+    return {"SystemOn": True, "Speed_Out": speed, "Efficiency": efficiency}
+
+
+def feed(
+    detector: AnomalyDetector,
+    efficiency: float,
+    start: float,
+    duration: float,
+    interval: float,
+) -> float | None:
+    """Feed a constant efficiency with some noise.
+
+    Returns the time at which the detector became degraded, if it did.
+    """
+    degraded_at = None
+    now = start
+    while now < start + duration:
+        noise = 0.5 if int(now / interval) % 2 else -0.5
+        if detector.update(snapshot(efficiency + noise), now) and detector.degraded:
+            degraded_at = now
+        now += interval
+    return degraded_at
+
+
+@pytest.mark.parametrize("interval", [10, 60, 600])
+def test_degradation_detected_after_sustained_time(interval):
+    detector = AnomalyDetector()
+    feed(detector, NORMAL, 0, WARMUP_TIME + HOUR, interval)
+    drop = WARMUP_TIME + HOUR
+
+    degraded_at = feed(detector, DEGRADED, drop, 3 * HOUR, interval)
+
+    # independent of the poll interval, a sample represents the time since the
+    # previous one
+    assert degraded_at is not None
+    assert SUSTAINED_TIME - interval <= degraded_at - drop <= SUSTAINED_TIME + 30 * 60
+
+
+def test_no_detection_during_warmup():
+    detector = AnomalyDetector()
+    feed(detector, NORMAL, 0, WARMUP_TIME / 2, 60)
+
+    assert feed(detector, DEGRADED, WARMUP_TIME / 2, WARMUP_TIME, 60) is None
+    assert not detector.degraded
+
+
+def test_short_drop_is_ignored():
+    detector = AnomalyDetector()
+    feed(detector, NORMAL, 0, WARMUP_TIME + HOUR, 60)
+
+    feed(detector, DEGRADED, WARMUP_TIME + HOUR, SUSTAINED_TIME / 2, 60)
+    feed(detector, NORMAL, WARMUP_TIME + 1.5 * HOUR, 2 * HOUR, 60)
+
+    assert not detector.degraded
+
+
+def test_recovery():
+    detector = AnomalyDetector()
+    feed(detector, NORMAL, 0, WARMUP_TIME + HOUR, 60)
+    feed(detector, DEGRADED, WARMUP_TIME + HOUR, 2 * HOUR, 60)
+    assert detector.degraded
+
+    feed(detector, NORMAL, WARMUP_TIME + 3 * HOUR, HOUR, 60)
+
+    # the degraded values did not become the new normal
+    assert not detector.degraded
+
+
+def test_speed_levels_are_learned_separately():
+    detector = AnomalyDetector()
+    feed(detector, NORMAL, 0, WARMUP_TIME + HOUR, 60)
+
+    # a lower efficiency at another speed is not a degradation
+    for minute in range(3 * 60):
+        now = WARMUP_TIME + HOUR + minute * 60
+        detector.update(snapshot(DEGRADED, speed=8), now)
+
+    assert not detector.degraded
+
+
+def test_switched_off():
+    detector = AnomalyDetector()
+    feed(detector, NORMAL, 0, WARMUP_TIME + HOUR, 60)
+
+    for minute in range(3 * 60):
+        data = {**snapshot(0), "SystemOn": False}
+        assert not detector.update(data, WARMUP_TIME + HOUR + minute * 60)
+
+    assert not detector.degraded
+
+
+def test_restore():
+    detector = AnomalyDetector()
+    feed(detector, NORMAL, 0, WARMUP_TIME + HOUR, 60)
+
+    # the state is stored as JSON
+    restored = AnomalyDetector(json.loads(json.dumps(detector.state)))
+
+    # the baseline is kept, no new warm-up is needed
+    degraded_at = feed(restored, DEGRADED, 10 * HOUR, 3 * HOUR, 60)
+    assert degraded_at is not None
+    assert degraded_at - 10 * HOUR <= SUSTAINED_TIME + 30 * 60
+
+
+def test_restore_degraded():
+    detector = AnomalyDetector()
+    feed(detector, NORMAL, 0, WARMUP_TIME + HOUR, 60)
+    feed(detector, DEGRADED, WARMUP_TIME + HOUR, 2 * HOUR, 60)
+
+    restored = AnomalyDetector(json.loads(json.dumps(detector.state)))
+
+    assert restored.degraded
+    assert not restored.update(snapshot(DEGRADED), 20 * HOUR)
+    assert restored.degraded
+
+
+def learned_state(current: float, low_time: float, degraded: bool) -> dict:
+    """State with the baseline of the recorded device learned."""
+    return {
+        "efficiency": {
+            "4": {
+                "baseline": [74.6, 0.25],
+                "current": [current, 0.0],
+                "observed": 2 * WARMUP_TIME,
+                "low_time": low_time,
+            }
+        },
+        "degraded": degraded,
+    }
+
+
+def store_anomalies(hass_storage: dict, state: dict) -> None:
+    key = f"{DOMAIN}.{ENTRY_ID}.anomalies"
+    hass_storage[key] = {"version": 1, "minor_version": 1, "key": key, "data": state}
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    yield
+
+
+async def test_issue_raised_for_restored_state(hass, hass_storage):
+    store_anomalies(hass_storage, learned_state(60.0, SUSTAINED_TIME, True))
+
+    entry = await setup_entry(
+        hass, ReplaySession(LIVE_RECORDING), entry_id=ENTRY_ID
+    )
+
+    assert ir.async_get(hass).async_get_issue(DOMAIN, ISSUE_ID)
+    assert hass.states.get("binary_sensor.keller_efficiency_degraded").state == "on"
+
+    # the issue of a removed device is deleted
+    await hass.config_entries.async_remove(entry.entry_id)
+    await hass.async_block_till_done()
+    assert not ir.async_get(hass).async_get_issue(DOMAIN, ISSUE_ID)
+
+
+async def test_issue_cleared_on_recovery(hass, hass_storage):
+    store_anomalies(hass_storage, learned_state(74.6, 0.0, True))
+
+    await setup_entry(hass, ReplaySession(LIVE_RECORDING), entry_id=ENTRY_ID)
+
+    assert not ir.async_get(hass).async_get_issue(DOMAIN, ISSUE_ID)
+    assert hass.states.get("binary_sensor.keller_efficiency_degraded").state == "off"
@@ -0,0 +1,118 @@
+"""Benchmark of the state write cost of all entities.
+
+The full entity set of DEVICES simulated devices is set up against recorded
+exports. A poll updates all coordinator listeners, which writes the state of
+every enabled entity. The mean cost per entity is reported as extra info.
+
+The benchmarks are excluded from the default run. Regressions are found by
+comparing against a baseline measured on the same host:
+
+    pytest -m benchmark --benchmark-save=baseline
+    pytest -m benchmark --benchmark-compare --benchmark-compare-fail=mean:10%
+"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from homeassistant.const import CONF_HOST  # noqa: E402
+from pytest_homeassistant_custom_component.common import MockConfigEntry  # noqa: E402
+
+from custom_components.bayernluefter.const import DOMAIN  # noqa: E402
+from custom_components.bayernluefter.pyernluefter.replay import (  # noqa: E402
+    ReplaySession,
+)
+
+from .conftest import LIVE_RECORDING  # noqa: E402
+
+pytestmark = pytest.mark.benchmark
+
+DEVICES = 20
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    yield
+
+
+def device_recording(tmp_path, index: int) -> str:
+    """Copy the recording with the MAC and name of a simulated device."""
+    path = tmp_path / f"device_{index}.jsonl"
+    with open(LIVE_RECORDING, encoding="utf-8") as src, open(
+        path, "w", encoding="utf-8"
+    ) as dst:
+        for line in src:
+            record = json.loads(line)
+            export = json.loads(record["b"])
+            export["MAC"] = f"A4CF12B3{index:04X}"
+            export["DeviceName"] = f"Device {index}"
+            record["b"] = json.dumps(export)
+            dst.write(json.dumps(record) + "\n")
+    return str(path)
+
+
+@pytest.fixture
+async def coordinators(hass, tmp_path):
+    """Set up DEVICES config entries, return their coordinators."""
+    result = []
+    for index in range(DEVICES):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={CONF_HOST: f"device-{index}"},
+            version=2,
+            minor_version=0,
+        )
+        entry.add_to_hass(hass)
+        session = ReplaySession(device_recording(tmp_path, index))
+        with patch(
+            "custom_components.bayernluefter.async_get_clientsession",
+            return_value=session,
+        ):
+            assert await hass.config_entries.async_setup(entry.entry_id)
+        result.append(hass.data[DOMAIN][entry.entry_id])
+    await hass.async_block_till_done()
+    return result
+
+
+def entities(coordinators) -> list:
+    """Return the enabled entities, i.e. the listeners of the coordinators."""
+    return [
+        update_callback.__self__
+        for coordinator in coordinators
+        for update_callback, _ in coordinator._listeners.values()
+    ]
+
+
+def report_per_entity(benchmark, count: int) -> None:
+    benchmark.extra_info["entities"] = count
+    if not benchmark.disabled:
+        per_entity = benchmark.stats.stats.mean / count
+        benchmark.extra_info["per_entity_us"] = per_entity * 1e6
+
+
+async def test_state_write_per_poll(hass, coordinators, benchmark):
+    count = len(entities(coordinators))
+    assert count == len(hass.states.async_all())
+
+    def poll() -> None:
+        for coordinator in coordinators:
+            coordinator.async_update_listeners()
+
+    benchmark(poll)
+    report_per_entity(benchmark, count)
+
+
+async def test_entity_properties(hass, coordinators, benchmark):
+    enabled = entities(coordinators)
+
+    def read() -> None:
+        for entity in enabled:
+            entity.available
+            entity.state
+
+    benchmark(read)
+    report_per_entity(benchmark, len(enabled))
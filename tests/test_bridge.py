@@ -0,0 +1,91 @@
+"""Tests of the MQTT bridge against a stand-in broker."""
+
+import json
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from homeassistant.components import mqtt  # noqa: E402
+
+from custom_components.bayernluefter.bridge import (  # noqa: E402
+    async_setup_mqtt_bridge,
+)
+from custom_components.bayernluefter.pyernluefter import ENDPOINT_JSON  # noqa: E402
+
+TOPIC = "bayernluefter/keller"
+MAC = "a4:cf:12:b3:c4:d5"
+
+
+class StandInBroker:
+    """Records messages like a broker, retained messages per topic."""
+
+    def __init__(self) -> None:
+        self.messages: list[tuple[str, str]] = []
+        self.retained: dict[str, str] = {}
+
+    async def async_publish(self, hass, topic, payload, qos=0, retain=False):
+        self.messages.append((topic, payload))
+        if retain:
+            self.retained[topic] = payload
+
+
+@pytest.fixture
+def broker(monkeypatch) -> StandInBroker:
+    broker = StandInBroker()
+    monkeypatch.setattr(mqtt, "async_publish", broker.async_publish)
+    return broker
+
+
+async def test_publishes_state_and_diff(hass, broker, coordinator_factory):
+    coordinator = coordinator_factory()
+    await coordinator.async_refresh()
+    stop = async_setup_mqtt_bridge(hass, coordinator, MAC, f"{TOPIC}/")
+
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    state = json.loads(broker.retained[f"{TOPIC}/state"])
+    assert state["Time"] == "10:00:10"
+    assert state["Temp_In"] == 19.9
+    assert state["SystemMode"] == "Kellermode"
+    diff = json.loads(dict(broker.messages)[f"{TOPIC}/diff"])
+    assert diff == {"Time": "10:00:10", "Temp_In": 19.9, "rel_Humidity_In": 64.0}
+
+    stop()
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert len(broker.messages) == 2
+
+
+async def test_ignores_other_devices(hass, broker, coordinator_factory):
+    coordinator = coordinator_factory()
+    stop = async_setup_mqtt_bridge(hass, coordinator, "00:11:22:33:44:55", TOPIC)
+
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert broker.messages == []
+    stop()
+
+
+async def test_keeps_polling_without_entities(hass, broker, coordinator_factory):
+    coordinator = coordinator_factory()
+    session = coordinator._device._session
+    await coordinator.async_refresh()
+    assert not coordinator._listeners
+
+    stop = async_setup_mqtt_bridge(hass, coordinator, MAC, TOPIC)
+    # the bridge is a listener, the coordinator schedules polls for it
+    assert coordinator._listeners
+    assert coordinator._unsub_refresh is not None
+
+    # the snapshot is shared, the bridge does not poll the device itself
+    remaining = session.remaining(ENDPOINT_JSON)
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert session.remaining(ENDPOINT_JSON) == remaining - 1
+    assert f"{TOPIC}/state" in broker.retained
+
+    stop()
+    assert not coordinator._listeners
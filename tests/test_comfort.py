@@ -0,0 +1,204 @@
+"""Tests of the comfort control."""
+
+import time
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from homeassistant.helpers import issue_registry as ir  # noqa: E402
+
+from custom_components.bayernluefter.comfort import (  # noqa: E402
+    ComfortController,
+    ComfortSetpoints,
+    compute_target_speed,
+)
+from custom_components.bayernluefter.const import DOMAIN  # noqa: E402
+
+SETPOINTS = ComfortSetpoints(target_humidity=55)
+
+# dry outdoor air, indoor humidity at the target
+DATA = {
+    "SystemOn": True,
+    "TimerActiv": False,
+    "Temp_In": 21.0,
+    "Temp_Out": 10.0,
+    "rel_Humidity_In": 55.0,
+    "rel_Humidity_Out": 60.0,
+    "abs_Humidity_In": 10.1,
+    "abs_Humidity_Out": 5.6,
+    "Speed_Out": 5,
+    "SpeedFrozen": False,
+}
+
+
+def target(setpoints: ComfortSetpoints = SETPOINTS, **changes) -> int | None:
+    return compute_target_speed({**DATA, **changes}, setpoints)
+
+
+@pytest.mark.parametrize("humidity", [52.0, 55.0, 58.0])
+def test_within_hysteresis(humidity):
+    assert target(rel_Humidity_In=humidity) is None
+
+
+def test_above_target():
+    unlimited = ComfortSetpoints(target_humidity=55, max_step=10)
+
+    assert target(unlimited, rel_Humidity_In=68.0) == 6
+    assert target(unlimited, rel_Humidity_In=90.0) == 10
+
+
+def test_below_target():
+    unlimited = ComfortSetpoints(target_humidity=55, max_step=10)
+
+    assert target(unlimited, rel_Humidity_In=50.0) == 1
+    assert target(unlimited, rel_Humidity_In=50.0, Speed_Out=1) is None
+
+
+def test_step_limit():
+    assert target(rel_Humidity_In=90.0) == 7
+    assert target(rel_Humidity_In=50.0) == 3
+
+
+def test_moist_outdoor_air():
+    unlimited = ComfortSetpoints(target_humidity=55, max_step=10)
+
+    assert target(unlimited, rel_Humidity_In=90.0, abs_Humidity_Out=10.5) == 1
+
+
+def test_condensation_risk():
+    unlimited = ComfortSetpoints(target_humidity=55, max_step=10)
+
+    # dew point of the outdoor air is about 23 °C
+    condensing = {"Temp_Out": 25.0, "rel_Humidity_Out": 90.0}
+    assert target(unlimited, rel_Humidity_In=90.0, **condensing) == 1
+
+
+@pytest.mark.parametrize(
+    "changes",
+    [
+        {"SystemOn": False},
+        {"TimerActiv": True},
+        {"Temp_Out": None},
+        {"rel_Humidity_In": 90.0, "abs_Humidity_In": None},
+    ],
+)
+def test_no_control(changes):
+    assert target(**changes) is None
+
+
+def test_missing_field():
+    data = {**DATA, "rel_Humidity_In": 90.0}
+    del data["Speed_Out"]
+
+    assert compute_target_speed(data, SETPOINTS) is None
+
+
+class FakeDevice:
+    """Device which applies speed commands unless told to drop them."""
+
+    url = "http://fake"
+
+    def __init__(self, **changes) -> None:
+        self.data = {**DATA, "DeviceName": "Keller", **changes}
+        self.commands: list[int] = []
+        self.drop_commands = False
+
+    async def set_speed(self, level: int) -> None:
+        self.commands.append(level)
+        if not self.drop_commands:
+            self.data.update(Speed_Out=level, SpeedFrozen=True)
+
+    async def reset_speed(self) -> None:
+        self.commands.append(0)
+        self.data.update(SpeedFrozen=False)
+
+
+class FakeCoordinator:
+    def __init__(self, device: FakeDevice) -> None:
+        self._device = device
+        self.last_update_success = True
+        self.last_snapshot_time: float | None = None
+
+    async def async_request_refresh(self) -> None:
+        self.last_snapshot_time = time.monotonic()
+
+
+@pytest.fixture
+def controller(hass):
+    controller = ComfortController(hass)
+    yield controller
+    controller.async_unregister("entry")
+
+
+def register(controller: ComfortController, **changes) -> FakeDevice:
+    device = FakeDevice(**changes)
+    controller.async_register(
+        "entry", FakeCoordinator(device), ComfortSetpoints(target_humidity=55)
+    )
+    return device
+
+
+async def test_rate_limit(controller):
+    device = register(controller, rel_Humidity_In=90.0)
+
+    await controller.async_tick()
+    await controller.async_tick()
+
+    assert device.commands == [7]
+
+
+async def test_resend_lost_command(controller, freezer):
+    device = register(controller, rel_Humidity_In=90.0)
+    device.drop_commands = True
+    await controller.async_tick()
+
+    freezer.tick(300)
+    await controller.async_tick()
+
+    # the lost command is sent again instead of pausing the control
+    assert device.commands == [7, 7]
+    assert not controller._devices["entry"].overridden
+
+
+async def test_manual_change_pauses_control(hass, controller, freezer):
+    device = register(controller, rel_Humidity_In=90.0)
+    await controller.async_tick()
+    await controller.async_tick()  # confirms the command
+
+    device.data["Speed_Out"] = 2
+    controller._devices["entry"].coordinator.last_snapshot_time = time.monotonic()
+    freezer.tick(300)
+    await controller.async_tick()
+    await controller.async_tick()
+
+    assert device.commands == [7]
+    issue_registry = ir.async_get(hass)
+    assert issue_registry.async_get_issue(DOMAIN, "comfort_control_paused_entry")
+
+    # the speed set by the user is kept
+    controller.async_unregister("entry")
+    await hass.async_block_till_done()
+    assert device.commands == [7]
+    assert not issue_registry.async_get_issue(DOMAIN, "comfort_control_paused_entry")
+
+
+async def test_unregister_resets_speed(hass, controller):
+    device = register(controller, rel_Humidity_In=90.0)
+    await controller.async_tick()
+
+    controller.async_unregister("entry")
+    await hass.async_block_till_done()
+
+    assert device.commands == [7, 0]
+    assert device.data["SpeedFrozen"] is False
+
+
+async def test_unregister_without_command(hass, controller):
+    device = register(controller)
+    await controller.async_tick()
+
+    controller.async_unregister("entry")
+    await hass.async_block_till_done()
+
+    assert device.commands == []
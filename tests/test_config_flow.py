@@ -0,0 +1,126 @@
+"""Tests of the config flow."""
+
+import json
+import time
+from http import HTTPStatus
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from aiohttp import ClientConnectionError  # noqa: E402
+from homeassistant import config_entries  # noqa: E402
+from homeassistant.const import CONF_HOST  # noqa: E402
+from homeassistant.data_entry_flow import FlowResultType  # noqa: E402
+from pytest_homeassistant_custom_component.common import MockConfigEntry  # noqa: E402
+
+from custom_components.bayernluefter.const import (  # noqa: E402
+    CONF_POWER_BY_SPEED,
+    DOMAIN,
+)
+from custom_components.bayernluefter.pyernluefter import (  # noqa: E402
+    ENDPOINT_HTML,
+    ENDPOINT_JSON,
+)
+
+from .conftest import (  # noqa: E402
+    LEGACY_PAGE,
+    LIVE_RECORDING,
+    FailingSession,
+    PageSession,
+)
+
+with open(LIVE_RECORDING, encoding="utf-8") as f:
+    EXPORT = json.loads(f.readline())["b"]
+
+OTHER_PAGE = "<html><head><title>Router</title></head></html>"
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    yield
+
+
+async def start_flow(hass, session):
+    with patch(
+        "custom_components.bayernluefter.config_flow."
+        "aiohttp_client.async_get_clientsession",
+        return_value=session,
+    ), patch("custom_components.bayernluefter.async_setup_entry", return_value=True):
+        return await hass.config_entries.flow.async_init(
+            DOMAIN,
+            context={"source": config_entries.SOURCE_USER},
+            data={CONF_HOST: "192.168.1.50"},
+        )
+
+
+async def test_create_entry(hass):
+    result = await start_flow(
+        hass, PageSession({ENDPOINT_JSON: (HTTPStatus.OK, EXPORT)})
+    )
+
+    assert result["type"] == FlowResultType.CREATE_ENTRY
+    assert result["title"] == "Keller @ 192.168.1.50"
+    assert result["result"].unique_id == "a4:cf:12:b3:c4:d5"
+
+
+@pytest.mark.parametrize(
+    ("pages", "error"),
+    [
+        ({}, "not_bayernluefter"),
+        ({ENDPOINT_HTML: (HTTPStatus.OK, OTHER_PAGE)}, "not_bayernluefter"),
+        ({ENDPOINT_HTML: (HTTPStatus.OK, LEGACY_PAGE)}, "legacy_firmware"),
+        ({ENDPOINT_JSON: (HTTPStatus.OK, "<html>")}, "malformed_response"),
+        ({ENDPOINT_JSON: (HTTPStatus.SERVICE_UNAVAILABLE, "")}, "cannot_connect"),
+        ({ENDPOINT_JSON: (HTTPStatus.OK, '{"DeviceName": "x"}')}, "not_bayernluefter"),
+    ],
+)
+async def test_errors(hass, pages, error):
+    result = await start_flow(hass, PageSession(pages))
+
+    assert result["type"] == FlowResultType.FORM
+    assert result["errors"] == {"base": error}
+
+
+async def test_connection_refused(hass):
+    result = await start_flow(hass, FailingSession(ClientConnectionError("refused")))
+
+    assert result["type"] == FlowResultType.FORM
+    assert result["errors"] == {"base": "cannot_connect"}
+
+
+async def test_hanging_host(hass):
+    start = time.monotonic()
+    with patch("custom_components.bayernluefter.pyernluefter.PROBE_TIMEOUT", 0.01):
+        result = await start_flow(hass, FailingSession(None))
+
+    # the probe gives up instead of waiting for the request timeout
+    assert time.monotonic() - start < 1
+    assert result["type"] == FlowResultType.FORM
+    assert result["errors"] == {"base": "cannot_connect"}
+
+
+@pytest.mark.parametrize(
+    ("power", "errors"),
+    [
+        ("", None),
+        ("2 3 4 5 6 7 8 9 10 11", None),
+        ("2 3 4", {"base": "invalid_power_by_speed"}),
+    ],
+)
+async def test_options_power_by_speed(hass, power, errors):
+    entry = MockConfigEntry(domain=DOMAIN, data={CONF_HOST: "192.168.1.50"})
+    entry.add_to_hass(hass)
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {CONF_POWER_BY_SPEED: power}
+    )
+
+    if errors is None:
+        assert result["type"] == FlowResultType.CREATE_ENTRY
+        assert entry.options[CONF_POWER_BY_SPEED] == power
+    else:
+        assert result["type"] == FlowResultType.FORM
+        assert result["errors"] == errors
@@ -0,0 +1,50 @@
+"""Tests of the fan platform."""
+
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from homeassistant.components.fan import (  # noqa: E402
+    ATTR_PERCENTAGE,
+    DOMAIN as FAN_DOMAIN,
+    SERVICE_SET_PERCENTAGE,
+)
+from homeassistant.const import ATTR_ENTITY_ID, SERVICE_TURN_OFF  # noqa: E402
+from homeassistant.exceptions import HomeAssistantError  # noqa: E402
+
+from custom_components.bayernluefter.pyernluefter import (  # noqa: E402
+    Bayernluefter,
+    CommandNotAppliedError,
+)
+from custom_components.bayernluefter.pyernluefter.replay import (  # noqa: E402
+    ReplaySession,
+)
+
+from .conftest import LIVE_RECORDING, setup_entry  # noqa: E402
+
+FAN = "fan.keller_fan"
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    yield
+
+
+@pytest.mark.parametrize(
+    ("service", "data", "command"),
+    [
+        (SERVICE_TURN_OFF, {}, "power_off"),
+        (SERVICE_SET_PERCENTAGE, {ATTR_PERCENTAGE: 50}, "set_speed"),
+    ],
+)
+async def test_command_not_applied(hass, service, data, command):
+    await setup_entry(hass, ReplaySession(LIVE_RECORDING))
+
+    with patch.object(Bayernluefter, "power_on"), patch.object(
+        Bayernluefter, command, side_effect=CommandNotAppliedError("not applied")
+    ), pytest.raises(HomeAssistantError, match="Keller did not apply command"):
+        await hass.services.async_call(
+            FAN_DOMAIN, service, {ATTR_ENTITY_ID: FAN, **data}, blocking=True
+        )
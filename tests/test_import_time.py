@@ -0,0 +1,87 @@
+"""Import-time benchmark of pyernluefter and the integration.
+
+Every import runs in a fresh interpreter with `python -X importtime`. Run this
+file directly to print the slowest imports.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMPONENT = os.path.join(ROOT, "custom_components", "bayernluefter")
+
+INTEGRATION = "custom_components.bayernluefter"
+PLATFORMS = ("binary_sensor", "fan", "number", "sensor", "update")
+
+# budgets for the own modules, without dependencies like aiohttp [us]
+LIBRARY_BUDGET = 20_000
+INTEGRATION_BUDGET = 50_000
+
+
+def import_times(module: str, path: str) -> dict[str, tuple[int, int]]:
+    """Import module in a fresh interpreter.
+
+    Returns self and cumulative import time in microseconds per module.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env={**os.environ, "PYTHONPATH": path},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def own_time(times: dict[str, tuple[int, int]], package: str) -> int:
+    return sum(
+        self_us
+        for name, (self_us, _) in times.items()
+        if name == package or name.startswith(f"{package}.")
+    )
+
+
+def test_library_is_standalone():
+    pytest.importorskip("aiohttp")
+    times = import_times("pyernluefter", COMPONENT)
+    assert not [name for name in times if name.startswith("homeassistant")]
+    assert "requests" not in times
+
+
+def test_library_import_time():
+    pytest.importorskip("aiohttp")
+    times = import_times("pyernluefter", COMPONENT)
+    assert own_time(times, "pyernluefter") < LIBRARY_BUDGET
+
+
+def test_integration_defers_platforms():
+    pytest.importorskip("homeassistant")
+    times = import_times(INTEGRATION, ROOT)
+    # platforms are imported by Home Assistant when they are set up
+    assert not [p for p in PLATFORMS if f"{INTEGRATION}.{p}" in times]
+    # the MQTT bridge imports mqtt only if it is enabled
+    assert "homeassistant.components.mqtt" not in times
+
+
+def test_integration_import_time():
+    pytest.importorskip("homeassistant")
+    times = import_times(INTEGRATION, ROOT)
+    assert own_time(times, INTEGRATION) < INTEGRATION_BUDGET
+
+
+if __name__ == "__main__":
+    for module, path in (("pyernluefter", COMPONENT), (INTEGRATION, ROOT)):
+        times = import_times(module, path)
+        print(f"{module}: {times[module][1] / 1000:.1f} ms cumulative")
+        slowest = sorted(times.items(), key=lambda item: item[1][0], reverse=True)
+        for name, (self_us, _) in slowest[:15]:
+            print(f"  {self_us / 1000:8.1f} ms  {name}")
@@ -0,0 +1,95 @@
+"""Tests of the config entry setup."""
+
+import asyncio
+from http import HTTPStatus
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from aiohttp import ClientConnectionError  # noqa: E402
+from homeassistant.config_entries import ConfigEntryState  # noqa: E402
+
+from custom_components.bayernluefter.const import DOMAIN  # noqa: E402
+from custom_components.bayernluefter.pyernluefter import (  # noqa: E402
+    ENDPOINT_HTML,
+    ENDPOINT_JSON,
+)
+from custom_components.bayernluefter.pyernluefter.replay import (  # noqa: E402
+    ReplaySession,
+)
+
+from .conftest import (  # noqa: E402
+    LEGACY_PAGE,
+    LIVE_RECORDING,
+    FailingSession,
+    PageSession,
+    setup_entry,
+)
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    yield
+
+
+async def test_setup(hass):
+    entry = await setup_entry(hass, ReplaySession(LIVE_RECORDING))
+
+    assert entry.state is ConfigEntryState.LOADED
+    assert hass.states.get("sensor.keller_temp_in").state == "19.8"
+
+
+async def test_energy_is_not_offered_as_measured(hass):
+    await setup_entry(hass, ReplaySession(LIVE_RECORDING))
+
+    state = hass.states.get("sensor.keller_energy_estimated")
+    # not available until the power per speed level is configured
+    assert state.state == "unavailable"
+    assert "device_class" not in state.attributes
+
+
+@pytest.mark.parametrize(
+    "exception", [ClientConnectionError("refused"), asyncio.TimeoutError()]
+)
+async def test_setup_retry_on_failure(hass, exception):
+    session = FailingSession(exception)
+    entry = await setup_entry(hass, session)
+
+    assert entry.state is ConfigEntryState.SETUP_RETRY
+    assert session.requests == 1
+    assert not hass.states.async_all()
+
+
+async def test_setup_retry_on_hanging_device(hass):
+    with patch("custom_components.bayernluefter.FIRST_ATTEMPT_TIMEOUT", 0.01):
+        entry = await setup_entry(hass, FailingSession(None))
+
+    assert entry.state is ConfigEntryState.SETUP_RETRY
+
+
+@pytest.mark.parametrize(
+    ("pages", "failures"),
+    [
+        # transient, the previous data is kept for two polls
+        ({ENDPOINT_JSON: (HTTPStatus.OK, "<html>")}, 3),
+        ({ENDPOINT_JSON: (HTTPStatus.SERVICE_UNAVAILABLE, "")}, 3),
+        # the template was removed or another host took the address
+        ({ENDPOINT_HTML: (HTTPStatus.OK, LEGACY_PAGE)}, 1),
+        ({}, 1),
+    ],
+)
+async def test_update_failed(hass, caplog, pages, failures):
+    entry = await setup_entry(hass, ReplaySession(LIVE_RECORDING))
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    coordinator._device._session = PageSession(pages)
+
+    for _ in range(failures - 1):
+        await coordinator.async_refresh()
+        assert coordinator.last_update_success
+    await coordinator.async_refresh()
+
+    assert not coordinator.last_update_success
+    assert hass.states.get("sensor.keller_temp_in").state == "unavailable"
+    assert "Unexpected error" not in caplog.text
@@ -0,0 +1,174 @@
+"""Tests of the snapshot journal."""
+
+import math
+import os
+
+import pytest
+
+from custom_components.bayernluefter.pyernluefter.convert import SystemMode
+from custom_components.bayernluefter.pyernluefter.journal import (
+    BOOL_FIELDS,
+    FLOAT_FIELDS,
+    HEADER,
+    NO_BOOL,
+    NO_ENUM,
+    NO_INT,
+    NO_SMALL_INT,
+    RECORD,
+    SMALL_INT_FIELDS,
+    JournalReader,
+    JournalWriter,
+    journal_files,
+    pack,
+    unpack,
+)
+
+SNAPSHOT = {
+    "Temp_In": 19.8,
+    "Temp_Out": -8.4,
+    "Temp_Fresh": 16.9,
+    "rel_Humidity_In": 64.2,
+    "rel_Humidity_Out": 78.5,
+    "abs_Humidity_In": 11.0,
+    "abs_Humidity_Out": 6.5,
+    "Efficiency": 74.6,
+    "RSSI": -61,
+    "Speed_In": 4,
+    "Speed_Out": 5,
+    "Speed_AntiFreeze": 0,
+    "Humidity_Transport": 412,
+    "SystemMode": SystemMode.Kellermode,
+    "SystemOn": True,
+    "FrostschutzAktiv": False,
+    "SpeedFrozen": True,
+    "AbtauMode": False,
+    "TimerActiv": False,
+    "VermieterMode": False,
+    "QuerlueftungAktiv": False,
+    # not journaled
+    "DeviceName": "Keller",
+}
+
+
+def round_trip(snapshot: dict, timestamp: float = 1792404000.5) -> dict:
+    return unpack(RECORD.unpack(pack(snapshot, timestamp)))
+
+
+def test_round_trip():
+    result = round_trip(SNAPSHOT)
+
+    expected = {key: value for key, value in SNAPSHOT.items() if key != "DeviceName"}
+    assert result == {"timestamp": 1792404000.5, **expected}
+
+
+def test_missing_values():
+    result = round_trip({})
+
+    assert result.pop("timestamp") == 1792404000.5
+    assert all(value is None for value in result.values())
+    assert len(result) == len(SNAPSHOT) - 1
+
+
+def test_missing_value_markers():
+    values = RECORD.unpack(pack({}, 0))
+
+    floats = values[1 : 1 + len(FLOAT_FIELDS)]
+    assert all(math.isnan(value) for value in floats)
+    i = 1 + len(FLOAT_FIELDS)
+    assert values[i : i + len(SMALL_INT_FIELDS)] == (NO_SMALL_INT,) * 4
+    i += len(SMALL_INT_FIELDS)
+    assert values[i : i + 2] == (NO_INT, NO_ENUM)
+    assert values[i + 2 :] == (NO_BOOL,) * len(BOOL_FIELDS)
+
+
+def test_none_and_nan():
+    result = round_trip({**SNAPSHOT, "Temp_In": None, "Efficiency": math.nan})
+
+    assert result["Temp_In"] is None
+    assert result["Efficiency"] is None
+    assert result["Temp_Out"] == -8.4
+
+
+def test_clamping():
+    out_of_range = {
+        "RSSI": -200,
+        "Speed_AntiFreeze": 300,
+        "Humidity_Transport": -(2**40),
+    }
+    result = round_trip({**SNAPSHOT, **out_of_range})
+
+    # clamped values are never mistaken for missing ones
+    assert result["RSSI"] == -127
+    assert result["Speed_AntiFreeze"] == 127
+    assert result["Humidity_Transport"] == NO_INT + 1
+
+
+@pytest.mark.parametrize(
+    "changes", [{"Temp_In": "19,8"}, {"RSSI": "-61"}, {"SystemOn": "on"}]
+)
+def test_unexpected_type(changes):
+    with pytest.raises(ValueError):
+        pack({**SNAPSHOT, **changes}, 0)
+
+
+def write(path: str, timestamps, **kwargs) -> None:
+    writer = JournalWriter(path, **kwargs)
+    for timestamp in timestamps:
+        writer.append({**SNAPSHOT, "Speed_Out": timestamp % 10}, timestamp)
+
+
+def timestamps(snapshots) -> list[float]:
+    return [snapshot["timestamp"] for snapshot in snapshots]
+
+
+@pytest.fixture
+def rotated(tmp_path) -> str:
+    """Journal of 10 snapshots, 3 per file, of which 3 files are kept."""
+    path = str(tmp_path / "device.journal")
+    write(
+        path,
+        range(10),
+        max_file_size=HEADER.size + 3 * RECORD.size,
+        max_files=3,
+    )
+    return path
+
+
+def test_rotation(rotated):
+    assert journal_files(rotated) == [f"{rotated}.2", f"{rotated}.1", rotated]
+    assert not os.path.exists(f"{rotated}.3")
+
+    # the oldest snapshots were dropped with the oldest file
+    assert timestamps(JournalReader(rotated).scan()) == [3, 4, 5, 6, 7, 8, 9]
+    assert timestamps(JournalReader(f"{rotated}.2").scan()) == [3, 4, 5]
+
+
+@pytest.mark.parametrize(
+    ("start", "end", "expected"),
+    [
+        (None, None, [3, 4, 5, 6, 7, 8, 9]),
+        (4, 7, [4, 5, 6, 7]),
+        (4.5, 6.5, [5, 6]),
+        (None, 5, [3, 4, 5]),
+        (8, None, [8, 9]),
+        (0, 2, []),
+        (10, None, []),
+    ],
+)
+def test_scan(rotated, start, end, expected):
+    snapshots = list(JournalReader(rotated).scan(start, end))
+
+    assert timestamps(snapshots) == expected
+    assert [s["Speed_Out"] for s in snapshots] == [t % 10 for t in expected]
+
+
+def test_scan_empty(tmp_path):
+    assert list(JournalReader(str(tmp_path / "missing.journal")).scan()) == []
+
+
+def test_incompatible_file(tmp_path):
+    path = tmp_path / "device.journal"
+    path.write_bytes(b"XXXX" + bytes(RECORD.size))
+
+    with pytest.raises(ValueError):
+        list(JournalReader(str(path)).scan())
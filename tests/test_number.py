@@ -0,0 +1,53 @@
+"""Tests of the number platform."""
+
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from homeassistant.components.number import (  # noqa: E402
+    ATTR_VALUE,
+    DOMAIN as NUMBER_DOMAIN,
+    SERVICE_SET_VALUE,
+)
+from homeassistant.const import ATTR_ENTITY_ID  # noqa: E402
+from homeassistant.exceptions import HomeAssistantError  # noqa: E402
+
+from custom_components.bayernluefter.const import DOMAIN  # noqa: E402
+from custom_components.bayernluefter.pyernluefter import (  # noqa: E402
+    Bayernluefter,
+    CommandNotAppliedError,
+)
+from custom_components.bayernluefter.pyernluefter.replay import (  # noqa: E402
+    ReplaySession,
+)
+
+from .conftest import LIVE_RECORDING, setup_entry  # noqa: E402
+
+SPEED_IN = "number.keller_speed_in_control"
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    yield
+
+
+async def test_command_not_applied(hass):
+    entry = await setup_entry(hass, ReplaySession(LIVE_RECORDING))
+    # the motor speeds can only be set while the device is switched off
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    coordinator.data["SystemOn"] = False
+    coordinator.async_update_listeners()
+
+    with patch.object(
+        Bayernluefter,
+        "set_speed_in",
+        side_effect=CommandNotAppliedError("not applied"),
+    ), pytest.raises(HomeAssistantError, match="Keller did not apply command"):
+        await hass.services.async_call(
+            NUMBER_DOMAIN,
+            SERVICE_SET_VALUE,
+            {ATTR_ENTITY_ID: SPEED_IN, ATTR_VALUE: 3},
+            blocking=True,
+        )
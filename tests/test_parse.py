@@ -0,0 +1,49 @@
+"""Tests of the tolerant export parser."""
+
+import pytest
+
+from custom_components.bayernluefter.pyernluefter.parse import (
+    decode_body,
+    parse_export,
+)
+
+EXPORT = '{"DeviceName": "Keller", "Temp_In": "19,8", "Temp_Out": "8,4"}'
+
+
+def test_complete_export():
+    result = parse_export(EXPORT)
+
+    assert result.complete
+    assert result.data == {"DeviceName": "Keller", "Temp_In": "19,8", "Temp_Out": "8,4"}
+
+
+def test_truncated_export_salvages_complete_pairs():
+    # cut within the value of Temp_Out
+    result = parse_export(EXPORT[: EXPORT.index("8,4") + 1])
+
+    assert not result.complete
+    assert result.data == {"DeviceName": "Keller", "Temp_In": "19,8"}
+
+
+def test_truncated_within_key():
+    result = parse_export(EXPORT[: EXPORT.index("Temp_Out") + 4])
+
+    assert result.data == {"DeviceName": "Keller", "Temp_In": "19,8"}
+
+
+@pytest.mark.parametrize("text", ["", "<html>", '{"DeviceName": "Kel', "[1, 2]"])
+def test_unusable_export(text):
+    with pytest.raises(ValueError):
+        parse_export(text)
+
+
+@pytest.mark.parametrize(
+    ("raw", "text"),
+    [
+        ("Küche".encode("utf-8"), "Küche"),
+        ("Küche".encode("latin-1"), "Küche"),
+        (b"Keller", "Keller"),
+    ],
+)
+def test_decode_body(raw, text):
+    assert decode_body(raw) == text
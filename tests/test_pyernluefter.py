@@ -0,0 +1,203 @@
+"""Tests of the Bayernluefter client library."""
+
+import asyncio
+import json
+from http import HTTPStatus
+
+import pytest
+
+from custom_components.bayernluefter import pyernluefter
+from custom_components.bayernluefter.pyernluefter import (
+    COMMAND_ATTEMPTS,
+    ENDPOINT_JSON,
+    Bayernluefter,
+    CommandNotAppliedError,
+)
+from custom_components.bayernluefter.pyernluefter.replay import ReplaySession
+
+from .conftest import LIVE_RECORDING, TRUNCATED_RECORDING
+
+with open(LIVE_RECORDING, encoding="utf-8") as f:
+    EXPORT = json.loads(json.loads(f.readline())["b"])
+
+# flag toggled by a button
+TOGGLES = {"?button=power": "SystemOn", "?button=timer": "TimerActiv"}
+
+
+async def test_update():
+    device = Bayernluefter("replay", ReplaySession(LIVE_RECORDING))
+
+    await device.update()
+
+    assert device.data["MAC"] == "A4CF12B3C4D5"
+    assert device.data["Temp_In"] == 19.8
+    assert device.data["SystemOn"] is True
+    assert device.last_response_complete
+    assert device.partial_responses == 0
+
+
+async def test_latin1_device_name():
+    device = Bayernluefter("replay", ReplaySession(TRUNCATED_RECORDING))
+
+    await device.update()
+
+    assert device.data["DeviceName"] == "Küche"
+
+
+async def test_truncated_update_keeps_last_known_values():
+    device = Bayernluefter("replay", ReplaySession(TRUNCATED_RECORDING))
+    await device.update()
+
+    await device.update()
+
+    assert not device.last_response_complete
+    assert device.partial_responses == 1
+    # salvaged from the truncated export
+    assert device.data["Temp_In"] == 20.1
+    # the cut value and the missing fields are kept from the previous export
+    assert device.data["rel_Humidity_In"] == 64.2
+    assert device.data["Efficiency"] == 74.6
+    assert device.data["DeviceName"] == "Küche"
+
+
+class DeviceSession:
+    """Session of a device which applies a command on its n-th sending."""
+
+    def __init__(self, apply_on: int | None) -> None:
+        self.export = dict(EXPORT)
+        self.requests: list[str] = []
+        self._apply_on = apply_on
+
+    def get(self, url, **kwargs):
+        target = url.removeprefix("http://device")
+        self.requests.append(target)
+        if target == ENDPOINT_JSON:
+            return DeviceResponse(json.dumps(self.export))
+        if self.requests.count(target) == self._apply_on:
+            self._apply(target)
+        return DeviceResponse("OK")
+
+    def _apply(self, target: str) -> None:
+        if target in TOGGLES:
+            key = TOGGLES[target]
+            self.export[key] = "0" if self.export[key] == "1" else "1"
+        elif target.startswith("?speed="):
+            self.export.update(Speed_Out=target.split("=")[1], SpeedFrozen="1")
+
+    def sent(self, target: str) -> int:
+        return self.requests.count(target)
+
+
+class DeviceResponse:
+    def __init__(self, body: str) -> None:
+        self.status = HTTPStatus.OK
+        self.content = self
+        self._body = body.encode()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    def raise_for_status(self) -> None:
+        pass
+
+    async def iter_any(self):
+        yield self._body
+
+
+@pytest.fixture(autouse=True)
+def no_verify_delay(monkeypatch):
+    monkeypatch.setattr(pyernluefter, "COMMAND_VERIFY_DELAY", 0)
+
+
+async def create_device(apply_on: int | None, verify: bool = True):
+    session = DeviceSession(apply_on)
+    device = Bayernluefter("device", session, verify_commands=verify)
+    await device.update()
+    session.requests.clear()
+    return device, session
+
+
+async def test_unverified_command():
+    device, session = await create_device(apply_on=None, verify=False)
+
+    await device.set_speed(7)
+
+    assert session.requests == ["?speed=7"]
+
+
+async def test_command_applied():
+    device, session = await create_device(apply_on=1)
+
+    await device.set_speed(7)
+
+    assert session.requests == ["?speed=7", ENDPOINT_JSON]
+    assert device.data["Speed_Out"] == 7
+    assert device.command_latency is not None
+
+
+async def test_command_sent_again():
+    device, session = await create_device(apply_on=2)
+
+    await device.set_speed(7)
+
+    assert session.requests == ["?speed=7", ENDPOINT_JSON] * 2
+    assert device.failed_commands == 0
+
+
+async def test_command_not_applied():
+    device, session = await create_device(apply_on=None)
+
+    with pytest.raises(CommandNotAppliedError):
+        await device.set_speed(7)
+
+    assert session.sent("?speed=7") == COMMAND_ATTEMPTS
+    assert session.sent(ENDPOINT_JSON) == COMMAND_ATTEMPTS
+    assert device.failed_commands == 1
+    assert device.command_latency is None
+
+
+async def test_toggle_is_not_sent_again():
+    device, session = await create_device(apply_on=2)
+
+    with pytest.raises(CommandNotAppliedError):
+        await device.power_toggle()
+
+    # a second toggle would revert the first one
+    assert session.sent("?button=power") == 1
+    assert session.sent(ENDPOINT_JSON) == COMMAND_ATTEMPTS
+
+
+async def test_toggle_applied():
+    device, session = await create_device(apply_on=1)
+
+    await device.timer_toggle()
+
+    assert device.data["TimerActiv"] is True
+    assert session.requests == ["?button=timer", ENDPOINT_JSON]
+
+
+async def test_concurrent_verifications_share_poll():
+    device, session = await create_device(apply_on=1)
+
+    await asyncio.gather(device.set_speed(7), device.timer_toggle())
+
+    assert session.sent(ENDPOINT_JSON) == 1
+    assert device.data["Speed_Out"] == 7
+    assert device.data["TimerActiv"] is True
+
+
+async def test_verification_uses_verify_refresh():
+    device, session = await create_device(apply_on=1)
+    refreshes = []
+
+    async def refresh():
+        refreshes.append(True)
+        await device.update()
+
+    device.verify_refresh = refresh
+    await device.set_speed(7)
+
+    assert refreshes == [True]